@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 05:46:52 2026
+
+@author: tienn
+
+Benchmarks for the routing, retrieval and prompt-assembly hot paths.
+Runs fully offline on synthetic CV databases with a deterministic
+stand-in embedding model, and writes a JSON report that can be diffed
+between versions:
+
+    python -m benchmarks.bench_pipeline -s 10 100 1000 -o bench.json
+    python -m benchmarks.bench_pipeline -o new.json --baseline bench.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import contextlib
+import numpy as np
+from datetime import datetime
+from chatbot.hashingEncoder import HashingEncoder
+from chatbot.orchestrator import CVOrchestrator
+from chatbot.metrics import PipelineMetrics
+from chatbot.vectorIndex import compare_precisions
+from tools.pickle_data import SecureDataTool
+from tools.secure_container import SecureContainer, write_container
+from cryptography.fernet import Fernet
+from typing import Dict, Any, List, Callable
+
+SKILLS = ["python", "c++", "c#", "java", "sql", "nosql", "react", "docker", "kubernetes", "aws",
+          "pytorch", "tensorflow", "machine learning", "leadership", "git", "linux", "spark",
+          "pandas", "numpy", "fastapi", "go", "rust", ".net", "scala", "airflow"]
+WORDS = ["built", "designed", "led", "migrated", "optimized", "pipeline", "service", "platform",
+         "team", "customers", "latency", "data", "model", "api", "dashboard", "tests", "cloud",
+         "reduced", "improved", "deployed", "features", "research", "students", "thesis"]
+TYPES = ["experience", "education", "project"]
+
+ANCHORS = {
+    "skills": ["How many years of experience do you have with Python?",
+               "What programming languages do you know?",
+               "Are you familiar with Docker and Kubernetes?"],
+    "experience": ["Tell me about your work experience.",
+                   "Where have you worked before?",
+                   "What was your role at your last company?"],
+    "education": ["What did you study?", "Which university did you attend?"],
+    "projects": ["What projects have you built?", "Tell me about a side project."],
+    "contact": ["How can I contact you?", "What is your email address?"],
+}
+
+QUERIES = ["How many years of {skill} do you have?",
+           "Tell me about your experience with {skill} and {skill2}.",
+           "Where did you use {skill}?",
+           "Tell me about your work experience.",
+           "What projects have you built with {skill}?",
+           "What did you study?",
+           "How can I contact you?",
+           "Write me a poem about cats."]
+
+def synthetic_database(size:int, seed:int=0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    database = []
+    for i in range(size):
+        category = rng.choice(TYPES)
+        start_year = rng.randint(2005, 2023)
+        end = "Present" if rng.random() < 0.1 else f"{min(start_year + rng.randint(0, 4), 2025)}-{rng.randint(1, 12):02d}"
+        name = f"Org {i % max(size // 5, 1)}"
+        role = rng.choice(["Engineer", "Data Scientist", "Team Lead", "Researcher"])
+        skills = rng.sample(SKILLS, rng.randint(1, 4))
+        words = rng.choices(WORDS, k=rng.randint(8, 25))
+        start = f"{start_year}-{rng.randint(1, 12):02d}"
+        database.append({
+            "id": f"{category[:3]}_{i:06d}",
+            "type": category,
+            "role": role,
+            "name": name,
+            "start_date": start,
+            "end_date": end,
+            "text": " ".join(words + skills),
+            "skills": skills,
+            "context_str": f"During my time as {role.lower()} at {name} ({start} to {end})",
+        })
+    return database
+
+def synthetic_queries(count:int, seed:int=1) -> List[str]:
+    rng = random.Random(seed)
+    queries = []
+    for i in range(count):
+        skill, skill2 = rng.sample(SKILLS, 2)
+        # The suffix keeps every query unique so exact-match caches never hit
+        queries.append(rng.choice(QUERIES).format(skill=skill, skill2=skill2) + f" #{i}")
+    return queries
+
+def summarize(latencies:List[float]) -> Dict[str, float]:
+    arr = np.asarray(latencies) * 1000.0
+    total = float(np.sum(latencies))
+    return {"n": len(latencies),
+            "p50_ms": round(float(np.percentile(arr, 50)), 4),
+            "p95_ms": round(float(np.percentile(arr, 95)), 4),
+            "mean_ms": round(float(np.mean(arr)), 4),
+            "throughput_per_s": round(len(latencies) / total, 2) if total > 0 else None}
+
+def measure(fn:Callable, inputs:List[Any], warmup:int=3) -> Dict[str, float]:
+    for x in inputs[:warmup]:
+        fn(x)
+    latencies = []
+    for x in inputs:
+        start = time.perf_counter()
+        fn(x)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS; this is the process peak so far
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+
+def bench_size(size:int, n_queries:int, n_builds:int, model) -> Dict[str, Any]:
+    database = synthetic_database(size)
+    queries = synthetic_queries(n_queries)
+    contacts = {"email_add": "candidate@example.com", "phone_num": "+00 000 000"}
+    results = {"size": size}
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Construction (anchors + corpus encoding, skill stats, indexes)
+        results["orchestrator_init"] = measure(
+            lambda _: CVOrchestrator(ANCHORS, database, contacts, embedding_model=model),
+            list(range(n_builds)), warmup=0)
+
+        orchestrator = CVOrchestrator(ANCHORS, database, contacts, embedding_model=model, query_cache_size=0)
+        router, retriever = orchestrator.router, orchestrator.retriever
+
+        results["route_query"] = measure(router.route_query, queries)
+        routed = [(q, router.route_query(q)) for q in queries]
+        allowed = [(q, r["intent"]) for q, r in routed if r["allowed"]] or [(q, "skills") for q in queries]
+        results["search"] = measure(lambda qi: retriever.search(qi[0], qi[1], top_k=5), allowed)
+        # Same queries through the BM25 shortlist, and the top-5 overlap with the dense-only search
+        lexical = CVOrchestrator(ANCHORS, database, contacts, embedding_model=model, query_cache_size=0,
+                                 lexical_prefilter=True).retriever
+        results["search_lexical"] = measure(lambda qi: lexical.search(qi[0], qi[1], top_k=5), allowed)
+        results["lexical_top5_overlap"] = round(float(np.mean([
+            len({r["id"] for r in retriever.search(q, i, top_k=5)} & {r["id"] for r in lexical.search(q, i, top_k=5)})
+            / max(len(retriever.search(q, i, top_k=5)), 1) for q, i in allowed])), 4)
+        results["handle_query"] = measure(orchestrator.handle_query, queries)
+        # Prompt size after context packing, and the estimated tokens it saved per answered query
+        # (only computed with metrics on, which the timings above ran without)
+        orchestrator.metrics = PipelineMetrics()
+        answered = [r for r in map(orchestrator.handle_query, queries) if r["status"] == "success"]
+        results["prompt_tokens_mean"] = round(float(np.mean([r["prompt_tokens"] for r in answered])), 1) if answered else None
+        results["prompt_tokens_saved_mean"] = round(float(np.mean([r["prompt_tokens_saved"] for r in answered])), 1) if answered else None
+
+        # Memory and recall@5 of the compact (float16 / int8) corpus matrices vs float32
+        results["index_precision"] = compare_precisions(retriever.corpus_embeddings.data,
+                                                        model.encode(queries), k=5)
+
+        # Decryption + JSON parsing of the database file
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "cv_atomic_db.json")
+            pickle_path = os.path.join(tmp, "cv_atomic_db.pkl")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(database, f)
+            tool = SecureDataTool(Fernet.generate_key())
+            tool.json_to_encrypted_pickle(json_path, pickle_path)
+            results["pickle_bytes"] = os.path.getsize(pickle_path)
+            results["load_encrypted_pickle"] = measure(tool.load_encrypted_pickle,
+                                                       [pickle_path] * max(n_builds, 3), warmup=1)
+
+            # Same data as a record-wise container: full load, and opening it to read one record
+            container_path = os.path.join(tmp, "cv_atomic_db.cvc")
+            write_container(database, container_path, tool.key)
+            results["container_bytes"] = os.path.getsize(container_path)
+            results["load_container"] = measure(lambda p: SecureContainer(p, tool.key).load(),
+                                                [container_path] * max(n_builds, 3), warmup=1)
+            results["open_container_one_record"] = measure(lambda p: SecureContainer(p, tool.key)[0],
+                                                           [container_path] * max(n_builds, 3), warmup=1)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def compare(report:Dict[str, Any], baseline:Dict[str, Any]):
+    """
+    Prints p50 ratios (new / baseline) for every benchmark present in both reports.
+    """
+    old = {r["size"]: r for r in baseline["results"]}
+    print(f"\n--- Compared to {baseline['meta'].get('git_revision')} (p50 new/old) ---")
+    for result in report["results"]:
+        base = old.get(result["size"])
+        if base is None:
+            continue
+        for name, stats in result.items():
+            if isinstance(stats, dict) and isinstance(base.get(name), dict) and base[name].get("p50_ms"):
+                ratio = stats["p50_ms"] / base[name]["p50_ms"]
+                print(f"size={result['size']:>6} {name:<22} {ratio:6.2f}x")
+
+def main(args):
+    model = HashingEncoder(dim=args.dim)
+    report = {"meta": {"timestamp": datetime.now().isoformat(timespec="seconds"),
+                       "git_revision": git_revision(),
+                       "python": platform.python_version(),
+                       "platform": platform.platform(),
+                       "model": f"HashingEncoder(dim={args.dim})",
+                       "queries": args.queries,
+                       "builds": args.builds},
+              "results": []}
+
+    for size in args.sizes:
+        result = bench_size(size, args.queries, args.builds, model)
+        report["results"].append(result)
+        summary = ", ".join(f"{k}={v['p50_ms']}ms" for k, v in result.items() if isinstance(v, dict) and "p50_ms" in v)
+        print(f"size={size}: {summary}, peak_rss={result['peak_rss_mb']}MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to '{args.output}'")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("-q", "--queries", type=int, default=200)
+    parser.add_argument("-b", "--builds", type=int, default=3)
+    parser.add_argument("-d", "--dim", type=int, default=384)
+    parser.add_argument("-o", "--output", type=str, default=None)
+    parser.add_argument("--baseline", type=str, default=None)
+    args = parser.parse_args()
+    main(args)
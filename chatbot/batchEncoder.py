@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 04:20:41 2026
+
+@author: tienn
+"""
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+class BatchingEncoder:
+    """
+    Shared front-end for `model.encode` that coalesces concurrent single-query
+    encodes. Requests queue up for at most `max_wait_ms` (or until
+    `max_batch_size` are pending) and are encoded as one batch, which uses the
+    CPU matrix-multiply throughput far better than one call per string.
+
+    Drop-in for the model where queries are encoded: `encode(str, **kwargs)`
+    blocks on the batched result, lists are passed straight to the model.
+    """
+    def __init__(self, model, max_batch_size:int=32, max_wait_ms:float=2.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._closed = False
+        # Makes "check closed + enqueue" atomic against close(): nothing is queued after the stop signal
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="batching-encoder", daemon=True)
+        self._worker.start()
+
+    def submit(self, text:str, **encode_kwargs) -> Future:
+        """
+        Queues one string and returns a future resolved with its embedding.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchingEncoder is closed.")
+            self._queue.put((text, encode_kwargs, future))
+        return future
+
+    def encode(self, sentences, **encode_kwargs):
+        if isinstance(sentences, str):
+            return self.submit(sentences, **encode_kwargs).result()
+        # Already a batch: nothing to coalesce
+        return self.model.encode(sentences, **encode_kwargs)
+
+    def close(self):
+        """
+        Stops accepting requests, encodes the ones already queued, then stops the worker.
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop signal back for the main loop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _encode_batch(self, batch):
+        # Requests with different encode options cannot share a call
+        groups = {}
+        for text, encode_kwargs, future in batch:
+            key = tuple(sorted(encode_kwargs.items()))
+            groups.setdefault(key, []).append((text, future))
+
+        for key, items in groups.items():
+            # Skip requests whose caller cancelled the future
+            live = [(t, f) for t, f in items if f.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                embeddings = self.model.encode([t for t, _ in live], **dict(key))
+            except Exception as e:
+                for _, f in live:
+                    f.set_exception(e)
+                continue
+            for i, (_, f) in enumerate(live):
+                f.set_result(embeddings[i])
+
+    def _run(self):
+        try:
+            while True:
+                first = self._queue.get()
+                if first is None:
+                    return
+                batch = self._collect(first)
+                try:
+                    self._encode_batch(batch)
+                except BaseException as e:
+                    # Whatever failed (bad options, interrupt), no caller of this batch is left waiting
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    if not isinstance(e, Exception):
+                        raise
+        finally:
+            self._fail_pending()
+
+    def _fail_pending(self):
+        """
+        Worker exit: refuses new requests and fails the ones still queued.
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[2].set_running_or_notify_cancel():
+                item[2].set_exception(RuntimeError("BatchingEncoder is closed."))
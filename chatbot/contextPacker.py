@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:02:19 2026
+
+@author: tienn
+"""
+import numpy as np
+from typing import Dict, Any, List, Optional, Callable
+
+def estimate_tokens(text:str) -> int:
+    """
+    Tokenizer-free estimate (~4 characters per token for English BPE vocabularies).
+    Only used for budgeting and reporting, so a cheap, stable estimate is enough.
+    """
+    return (len(text) + 3) // 4
+
+def format_snippet(result:Dict[str, Any]) -> str:
+    return f"- [{result['context']}]: {result['content']}"
+
+class ContextPacker:
+    """
+    Selects the retrieved snippets that go into the system prompt, within a
+    token budget:
+        1. snippets scoring below `min_score` are dropped (the best one is always kept)
+        2. the rest are picked greedily by MMR, relevance traded against the
+           similarity to the snippets already picked, using the corpus embeddings
+        3. near-duplicates (cosine >= `duplicate_threshold` with a picked snippet) are skipped
+        4. a snippet is only added if it fits in what is left of the budget;
+           the first one is cut at a word boundary when it alone exceeds it
+    """
+    def __init__(self, token_budget:int=400, min_score:float=0.2, mmr_lambda:float=0.7,
+                 duplicate_threshold:float=0.92, count_tokens:Callable[[str], int]=estimate_tokens):
+        self.token_budget = token_budget
+        self.min_score = min_score
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_threshold = duplicate_threshold
+        self.count_tokens = count_tokens
+
+    def truncate(self, line:str, budget:int) -> str:
+        if self.count_tokens(line) <= budget:
+            return line
+        words = line.split()
+        # Binary search on the number of words that fit (with the ellipsis)
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(" ".join(words[:middle]) + " ...") <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        return " ".join(words[:low]) + " ..."
+
+    def pack(self, results:List[Dict[str, Any]], vectors:Optional[np.ndarray]=None) -> List[str]:
+        """
+        Snippet lines to put in the prompt, most relevant first. `vectors` are
+        the unit-norm embeddings of `results` (same order); without them only
+        exact duplicates are detected.
+        """
+        if not results:
+            return []
+        scores = np.array([r['score'] for r in results], dtype=np.float32)
+        keep = [i for i in np.argsort(-scores, kind="stable") if scores[i] >= self.min_score]
+        keep = keep or [int(np.argmax(scores))]
+
+        if vectors is not None:
+            similarity = vectors @ vectors.T
+        else:
+            lines = [format_snippet(r) for r in results]
+            similarity = np.array([[float(a == b) for b in lines] for a in lines], dtype=np.float32)
+
+        picked, packed, used = [], [], 0
+        remaining = list(keep)
+        while remaining:
+            # MMR: relevance minus redundancy with what is already in the prompt
+            redundancy = similarity[np.ix_(remaining, picked)].max(axis=1) if picked else np.zeros(len(remaining))
+            mmr = self.mmr_lambda * scores[remaining] - (1.0 - self.mmr_lambda) * redundancy
+            best = int(np.argmax(mmr))
+            i = remaining.pop(best)
+            if picked and redundancy[best] >= self.duplicate_threshold:
+                continue
+            line = format_snippet(results[i])
+            cost = self.count_tokens(line)
+            if not picked and cost > self.token_budget:
+                line = self.truncate(line, self.token_budget)
+                cost = self.count_tokens(line)
+            elif used + cost > self.token_budget:
+                continue
+            picked.append(i)
+            packed.append(line)
+            used += cost
+        return packed
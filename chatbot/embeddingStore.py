@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 02:31:54 2026
+
+@author: tienn
+"""
+import os
+import re
+import json
+import logging
+import hashlib
+import threading
+import contextlib
+import numpy as np
+from chatbot.vectorIndex import normalize_rows
+from typing import List
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, a single process per store is assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Rows reserved by the first write; the capacity then doubles when it runs out
+MIN_CAPACITY = 1024
+
+class EmbeddingStore:
+    """
+    Content-addressed, on-disk embedding cache.
+    Every text is keyed by sha256(model name + text). Vectors live in a raw
+    float32 file that is memory-mapped read-only, so a warm start does not
+    encode anything and does not copy the matrix. Only new or edited texts
+    are sent to the model, and their vectors are written in place after the
+    last row: the file is preallocated and grows geometrically, so an append
+    costs the new rows, not a rewrite of the matrix.
+
+    Layout in `directory` (one pair of files per model):
+        embeddings_<model>.f32   : row-major float32 matrix (rows past the index are free capacity)
+        embeddings_<model>.json  : {"model_name", "dim", "keys": [row -> key]}
+        embeddings_<model>.lock  : writers' lock file
+
+    Several processes may share a store (pre-forked server workers, profiles
+    loaded by different workers). Appends hold an exclusive file lock and
+    re-read the on-disk index under it, so every write extends the latest
+    matrix and index, never a stale copy of another process's.
+    """
+    def __init__(self, directory:str, model, model_name:str):
+        self.model = model
+        self.model_name = model_name
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.vectors_path = os.path.join(directory, f"embeddings_{safe_name}.f32")
+        self.index_path = os.path.join(directory, f"embeddings_{safe_name}.json")
+        self.lock_path = os.path.join(directory, f"embeddings_{safe_name}.lock")
+        self._lock = threading.Lock()
+        self._load()
+
+    def key(self, text:str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """
+        Exclusive across processes (flock), released when the block exits.
+        """
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _load(self):
+        self.keys = []
+        self.dim = None
+        self.vectors = None
+        if not (os.path.exists(self.index_path) and os.path.exists(self.vectors_path)):
+            self.rows = {}
+            return
+
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("model_name") != self.model_name or not index.get("keys"):
+            self.rows = {}
+            return
+
+        self.keys = index["keys"]
+        self.dim = index["dim"]
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                 shape=(len(self.keys), self.dim))
+        self.rows = {k: i for i, k in enumerate(self.keys)}
+
+    def _append(self, keys:List[str], new_vectors:np.ndarray):
+        """
+        Writes the vectors after the last indexed row, then replaces the index
+        atomically. Must be called under _file_lock() right after _load(), so
+        the rows being extended are the ones on disk. Rows that readers (in
+        any process) have mapped are never rewritten, and the index is only
+        published once the rows it points to are on disk.
+        """
+        new_vectors = np.ascontiguousarray(new_vectors, dtype=np.float32)
+        row_bytes = new_vectors.shape[1] * new_vectors.itemsize
+        if self.vectors is None:
+            # No (valid) index: start a new file
+            self.dim = new_vectors.shape[1]
+            mode = "wb"
+        else:
+            mode = "r+b"
+
+        with open(self.vectors_path, mode) as f:
+            used = len(self.keys)
+            capacity = os.fstat(f.fileno()).st_size // row_bytes
+            if used + len(new_vectors) > capacity:
+                # Geometric growth: the file is extended (not copied), O(log n) times in total
+                capacity = max(used + len(new_vectors), 2 * capacity, MIN_CAPACITY)
+                f.truncate(capacity * row_bytes)
+            f.seek(used * row_bytes)
+            f.write(new_vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        tmp_index = f"{self.index_path}.tmp{os.getpid()}"
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump({"model_name": self.model_name,
+                       "dim": self.dim,
+                       "keys": self.keys + keys}, f)
+        os.replace(tmp_index, self.index_path)
+
+        self._load()
+
+    def encode(self, texts:List[str]) -> np.ndarray:
+        """
+        Returns a (len(texts), dim) float32 matrix, encoding only the texts
+        that are not in the store yet.
+        """
+        with self._lock:
+            text_keys = [self.key(t) for t in texts]
+
+            if any(k not in self.rows for k in text_keys):
+                with self._file_lock():
+                    # Another process may have appended since our last load: start from the disk state
+                    self._load()
+                    missing = {}
+                    for k, t in zip(text_keys, texts):
+                        if k not in self.rows and k not in missing:
+                            missing[k] = t
+
+                    if missing:
+                        logger.info("Embedding store: encoding %d new/changed texts.", len(missing))
+                        new_vectors = self.model.encode(list(missing.values()), convert_to_numpy=True)
+                        # Stored unit-norm so the float32 index can score the mapped rows without a copy
+                        new_vectors = normalize_rows(np.asarray(new_vectors, dtype=np.float32))
+                        self._append(list(missing.keys()), new_vectors)
+
+            if not texts:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+
+            row_ids = [self.rows[k] for k in text_keys]
+            # Same texts in the same order as the stored rows: hand out the mapped view, no copy
+            if row_ids == list(range(row_ids[0], row_ids[0] + len(row_ids))):
+                return self.vectors[row_ids[0]:row_ids[0] + len(row_ids)]
+            return np.asarray(self.vectors[row_ids])
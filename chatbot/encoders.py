@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 07:02:47 2026
+
+@author: tienn
+"""
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+def load_embedding_model(model_name:str=MODEL_NAME):
+    """
+    Builds the SentenceTransformer encoder. sentence_transformers (and so
+    torch) is only imported here; scoring works on NumPy arrays, so importing
+    the chatbot package, the data tools or the pure utils stays cheap.
+    """
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 12:08:35 2026
+
+@author: tienn
+"""
+import time
+import threading
+from datetime import datetime
+from chatbot.intervals import MonthIntervals, month_index
+from chatbot.utils import format_atomic_data, normalize_skill, is_present
+from typing import Dict, Any, List, Optional, Callable
+
+class FactTable:
+    """
+    Quantitative facts of one CV, precomputed once and read in O(1):
+    months per skill, months per chunk type (experience / education /
+    project) and total years of professional experience. All of them are
+    month-granular unions (chatbot.intervals), so overlapping roles are
+    counted once.
+
+    Rows that end "present" are the only time-dependent part. The tables are
+    recomputed at most every `refresh_interval` seconds (checked lazily on
+    lookup, one vectorized pass) and only when the date actually moved, so a
+    long-running process does not serve numbers frozen at load time and a
+    query never pays for the recomputation. `revision` changes whenever the
+    facts do.
+    """
+    def __init__(self, database:List[Dict[str, Any]], refresh_interval:float=3600.0,
+                 clock:Callable[[], datetime]=datetime.today):
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        # 1. Parse every row once, into integer month intervals
+        # (one pass over a lazily decrypted container, only the intervals are kept)
+        database = list(database)
+        ongoing = [is_present(doc.get("end_date", "")) for doc in database]
+        self.intervals = MonthIntervals(format_atomic_data(database), ongoing, clock())
+
+        # 2. Tables, filled by refresh()
+        self.skill_months = {}
+        self.type_months = {}
+        self.total_years = 0.0
+        self.as_of = None
+        self.revision = 0
+        self._next_refresh = 0.0
+        self.refresh(force=True)
+
+    def refresh(self, force:bool=False):
+        """
+        Moves the "present" rows to today and recomputes the tables if that changed anything.
+        """
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return
+        with self._lock:
+            if not force and now < self._next_refresh:
+                return
+            today = self.clock()
+            self._next_refresh = now + self.refresh_interval
+            if not force and self.as_of is not None and month_index(today) == month_index(self.as_of):
+                return
+
+            self.intervals.set_today(today)
+            skill_months = self.intervals.skill_months()
+            type_months = self.intervals.type_months()
+            changed = skill_months != self.skill_months or type_months != self.type_months
+            # Swapped whole, so a concurrent reader sees either the old or the new table
+            self.skill_months = skill_months
+            self.type_months = type_months
+            self.total_years = round(type_months.get("experience", 0) / 12.0, 2)
+            self.as_of = today
+            if changed:
+                self.revision += 1
+
+    def get_skill_months(self, skill:str) -> Optional[int]:
+        """
+        Months of experience with a skill, None when the CV never mentions it.
+        """
+        self.refresh()
+        return self.skill_months.get(normalize_skill(skill))
+
+    def get_type_months(self, chunk_type:str) -> int:
+        self.refresh()
+        return self.type_months.get(chunk_type, 0)
+
+    def get_total_years(self) -> float:
+        """
+        Total years of professional experience, overlapping roles counted once.
+        """
+        self.refresh()
+        return self.total_years
+
+    def get_years(self, skill:Optional[str]=None, chunk_type:Optional[str]=None,
+                  start:Optional[datetime]=None, end:Optional[datetime]=None) -> float:
+        """
+        Arbitrary window queries, e.g. years of Python between 2018 and 2021.
+        """
+        self.refresh()
+        return round(self.intervals.months(skill, chunk_type, start, end) / 12.0, 2)
@@ -6,14 +6,47 @@ Created on Fri Dec 12 20:03:12 2025
 @author: tienn
 """
 
+import logging
 import numpy as np
 from chatbot.utils import load_data
-from sentence_transformers import SentenceTransformer, util
+from chatbot.queryContext import QueryContext
+from chatbot.encoders import load_embedding_model
+from chatbot.vectorIndex import EmbeddingMatrix, normalize_rows, to_numpy
+
+logger = logging.getLogger(__name__)
+
+ROUTER_MODES = ("exhaustive", "centroid")
 
 class CVGuardrailRouter:
+    """
+    Semantic guardrail: maps a query to the intent of its closest anchor
+    question, or blocks it when nothing is close enough.
+
+    mode:
+        exhaustive : score the query against every anchor (reference)
+        centroid   : score the per-intent centroids first, then only the
+                     anchors of the `n_probe` closest intents (IVF-style),
+                     so the per-query cost no longer grows with the whole
+                     anchor set
+    vote_k > 1 picks the intent by a similarity-weighted vote of the top
+    vote_k scored anchors instead of the single best one. The reported score
+    is always the best anchor similarity of the chosen intent, so the
+    threshold means the same thing in every mode.
+    """
     def __init__(self,
                  model,
-                 routes):
+                 routes,
+                 embedding_store=None,
+                 precision="float32",
+                 mode="exhaustive",
+                 n_probe=2,
+                 vote_k=1):
+        if mode not in ROUTER_MODES:
+            raise ValueError(f"Unknown router mode '{mode}', expected one of {ROUTER_MODES}")
+        self.mode = mode
+        self.n_probe = n_probe
+        self.vote_k = vote_k
+
         # 1. Load a lightweight, fast model optimized for semantic similarity
         self.model = model
         
@@ -23,53 +56,161 @@ class CVGuardrailRouter:
         
         # 3. Pre-compute embeddings for all anchors (This happens once at startup)
         # We flatten the list to store them efficiently
+        # Anchors of one intent are contiguous: intent i owns rows [starts[i], starts[i + 1])
         self.intent_map = []
+        self.intents = []
+        starts = []
         all_sentences = []
         
         for intent, examples in self.routes.items():
+            if not examples:
+                continue
+            self.intents.append(intent)
+            starts.append(len(all_sentences))
             for example in examples:
                 self.intent_map.append(intent)
                 all_sentences.append(example)
+        self.intent_bounds = list(zip(starts, starts[1:] + [len(all_sentences)]))
+        self.anchor_intent_ids = np.repeat(np.arange(len(self.intents)), np.diff(starts + [len(all_sentences)]))
         
-        # Encode all anchors into a matrix
-        self.anchor_embeddings = self.model.encode(all_sentences, convert_to_tensor=True)
+        # Encode all anchors into a matrix (served from the on-disk store when available)
+        if embedding_store is not None:
+            anchor_vectors = embedding_store.encode(all_sentences)
+        else:
+            anchor_vectors = self.model.encode(all_sentences, convert_to_numpy=True)
+        # Pre-normalized, optionally compact (float16 / int8), scored with NumPy
+        self.anchor_embeddings = EmbeddingMatrix(anchor_vectors, precision)
+
+        # 4. Per-intent centroids (mean of the unit-norm anchors) for the probing mode
+        self.centroids = None
+        if self.mode == "centroid":
+            unit_vectors = normalize_rows(to_numpy(anchor_vectors))
+            centroids = np.stack([unit_vectors[a:b].mean(axis=0) for a, b in self.intent_bounds])
+            self.centroids = EmbeddingMatrix(centroids, precision)
         print("Guardrail Router initialized.")
 
-    def route_query(self, user_query, threshold=0.35):
+    def _score_anchors(self, query_vectors):
         """
-        Takes a user query and returns the matching INTENT or None if blocked.
+        Scored (query, anchor) pairs for a batch of queries, as three flat
+        arrays: query ids, anchor ids and similarities. In centroid mode only
+        the anchor slices of each query's `n_probe` closest intents are scored.
         """
-        # 1. Encode the user's query
-        query_embedding = self.model.encode(user_query, convert_to_tensor=True)
-        
-        # 2. Calculate cosine similarity against all anchor questions
-        cosine_scores = util.cos_sim(query_embedding, self.anchor_embeddings)[0]
-        
-        # 3. Find the best match
-        best_match_idx = np.argmax(cosine_scores.cpu().numpy())
-        best_score = cosine_scores[best_match_idx].item()
-        best_intent = self.intent_map[best_match_idx]
-        
-        print(f"DEBUG: Query='{user_query}' | Best Match='{self.routes[best_intent][0]}' | Score={best_score:.4f}")
+        n_queries = len(query_vectors)
+        if self.mode == "exhaustive" or self.n_probe >= len(self.intents):
+            scores = self.anchor_embeddings.score_batch(query_vectors)
+            return (np.repeat(np.arange(n_queries), scores.shape[1]),
+                    np.tile(np.arange(scores.shape[1]), n_queries), scores.ravel())
 
-        # 4. The Guardrail Check
+        centroid_scores = self.centroids.score_batch(query_vectors)
+        probed = np.argpartition(-centroid_scores, self.n_probe - 1, axis=1)[:, :self.n_probe]
+        query_ids, anchor_ids, scores = [], [], []
+        for intent_id in np.unique(probed):
+            # Every query that probed this intent, scored against its anchors in one product
+            a, b = self.intent_bounds[intent_id]
+            hits = np.flatnonzero((probed == intent_id).any(axis=1))
+            query_ids.append(np.repeat(hits, b - a))
+            anchor_ids.append(np.tile(np.arange(a, b), len(hits)))
+            scores.append(self.anchor_embeddings.slice(a, b).score_batch(query_vectors[hits]).ravel())
+        return np.concatenate(query_ids), np.concatenate(anchor_ids), np.concatenate(scores)
+
+    def _match(self, query_vectors):
+        """
+        Best intent id and its score for each query, two arrays of shape (n_queries,).
+        """
+        n_queries = len(query_vectors)
+        query_ids, anchor_ids, scores = self._score_anchors(query_vectors)
+        intent_ids = self.anchor_intent_ids[anchor_ids]
+        # Best anchor per (query, intent); intents that were not probed stay at -inf
+        intent_scores = np.full((n_queries, len(self.intents)), -np.inf, dtype=np.float32)
+        np.maximum.at(intent_scores, (query_ids, intent_ids), scores)
+        rows = np.arange(n_queries)
+
+        if self.vote_k > 1:
+            # The vote_k best scored anchors of each query: rank within the query after one sort
+            order = np.lexsort((-scores, query_ids))
+            group_starts = np.searchsorted(query_ids[order], rows)
+            ranks = np.arange(len(order)) - np.repeat(group_starts, np.bincount(query_ids, minlength=n_queries))
+            top = order[ranks < self.vote_k]
+            votes = np.zeros_like(intent_scores)
+            np.add.at(votes, (query_ids[top], intent_ids[top]), scores[top])
+            # An intent without votes can not win against negative vote totals
+            voted = np.zeros(votes.shape, dtype=bool)
+            voted[query_ids[top], intent_ids[top]] = True
+            best = np.argmax(np.where(voted, votes, -np.inf), axis=1)
+        else:
+            best = np.argmax(intent_scores, axis=1)
+        return best, intent_scores[rows, best]
+
+    def _result(self, best_intent, best_score, threshold, query_context):
+        # The Guardrail Check
         if best_score < threshold:
+            query_context.intent = None
             return {
                 "allowed": False, 
                 "reason": "out_of_scope", 
                 "score": best_score
             }
         
+        query_context.intent = best_intent
         return {
             "allowed": True, 
             "intent": best_intent, 
             "score": best_score
         }
 
+    def route_query(self, user_query, threshold=0.35, query_context=None):
+        """
+        Takes a user query and returns the matching INTENT or None if blocked.
+        """
+        # 1. Encode the user's query (shared with the retrieval engine through the context)
+        query_context = QueryContext.ensure(query_context, user_query, self.model)
+        with query_context.timer("guardrail_encode"):
+            query_embedding = query_context.embedding
+        
+        with query_context.timer("guardrail_scoring"):
+            # 2. Calculate cosine similarity against the anchor questions
+            # 3. Find the best match
+            best, scores = self._match(to_numpy(query_embedding).reshape(1, -1))
+            best_score = float(scores[0])
+            best_intent = self.intents[int(best[0])]
+        
+        logger.debug("Query='%s' | Best Match='%s' | Score=%.4f", user_query, self.routes[best_intent][0], best_score)
+
+        # 4. The Guardrail Check
+        return self._result(best_intent, best_score, threshold, query_context)
+
+    def route_queries(self, user_queries, threshold=0.35, query_contexts=None):
+        """
+        Batch version of route_query: one encode call for the queries that are
+        not encoded yet and one vectorized scoring pass for all of them.
+        Returns one result dict per query, in order.
+        """
+        # 1. Encode, in one batch, only the queries without an embedding
+        if query_contexts is None:
+            if not user_queries:
+                return []
+            vectors = self.model.encode(list(user_queries), convert_to_numpy=True)
+            query_contexts = [QueryContext.from_embedding(q, v, self.model) for q, v in zip(user_queries, vectors)]
+        if not query_contexts:
+            return []
+        missing = [c for c in query_contexts if not c.is_encoded]
+        if missing:
+            vectors = self.model.encode([c.text for c in missing], convert_to_numpy=True)
+            for c, vector in zip(missing, vectors):
+                c.embedding = vector
+
+        # 2./3. Score and match every query at once
+        query_vectors = np.stack([to_numpy(c.embedding).reshape(-1) for c in query_contexts])
+        best, scores = self._match(query_vectors)
+
+        # 4. The Guardrail Check
+        return [self._result(self.intents[int(i)], float(score), threshold, c)
+                for i, score, c in zip(best, scores, query_contexts)]
+
 # --- usage Example ---
 def main():
     # Initialize the router (Do this once when app starts)
-    router = CVGuardrailRouter(model=SentenceTransformer('all-MiniLM-L6-v2'), routes=load_data('anchors.json'))
+    router = CVGuardrailRouter(model=load_embedding_model(), routes=load_data('anchors.json'))
 
     # Simulate User Queries
     test_queries = [
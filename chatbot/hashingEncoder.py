@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 05:31:09 2026
+
+@author: tienn
+"""
+import re
+import zlib
+import numpy as np
+
+_token_re = re.compile(r"\w+")
+
+class HashingEncoder:
+    """
+    Deterministic, offline stand-in for SentenceTransformer (benchmarks, tests).
+    Each token (and token bigram) is hashed with crc32 into a signed bucket of a
+    `dim`-sized vector, which is then L2-normalized. Texts sharing words get
+    similar vectors, which is enough to exercise routing and retrieval.
+    """
+    def __init__(self, dim:int=384):
+        self.dim = dim
+        self._cache = {}
+
+    def _bucket(self, token:str):
+        h = self._cache.get(token)
+        if h is None:
+            code = zlib.crc32(token.encode("utf-8"))
+            h = (code % self.dim, 1.0 if (code >> 16) & 1 else -1.0)
+            self._cache[token] = h
+        return h
+
+    def _encode_one(self, text:str, out:np.ndarray):
+        tokens = _token_re.findall(text.lower())
+        for token in tokens:
+            idx, sign = self._bucket(token)
+            out[idx] += sign
+        for a, b in zip(tokens, tokens[1:]):
+            idx, sign = self._bucket(f"{a} {b}")
+            out[idx] += 0.5 * sign
+        norm = np.linalg.norm(out)
+        if norm > 0:
+            out /= norm
+
+    def encode(self, sentences, convert_to_tensor:bool=False, convert_to_numpy:bool=True, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            self._encode_one(text, embeddings[i])
+        if single:
+            embeddings = embeddings[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(embeddings)
+        return embeddings
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 13:01:47 2026
+
+@author: tienn
+"""
+import numpy as np
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence
+
+def month_index(d:datetime) -> int:
+    return d.year * 12 + d.month - 1
+
+def union_lengths(groups:np.ndarray, starts:np.ndarray, ends:np.ndarray, n_groups:int) -> np.ndarray:
+    """
+    Length of the union of the half-open intervals [starts, ends) of every
+    group, in one vectorized pass (no Python loop over groups or intervals).
+
+    Intervals are sorted by (group, start); each one then only adds the part
+    that sticks out past the running maximum end of its group:
+        added_i = max(0, runmax_i - max(start_i, runmax_{i-1}))
+    Offsetting every group by group * span makes one cumulative maximum
+    restart at each group boundary.
+    """
+    if not len(starts):
+        return np.zeros(n_groups, dtype=np.int64)
+    groups = np.asarray(groups, dtype=np.int64)
+    base = int(min(starts.min(), ends.min()))
+    span = int(max(starts.max(), ends.max())) - base + 1
+    order = np.lexsort((starts, groups))
+    offset = groups[order] * span - base
+    s = starts[order] + offset
+    e = ends[order] + offset
+
+    runmax = np.maximum.accumulate(e)
+    previous = np.concatenate(([np.iinfo(np.int64).min], runmax[:-1]))
+    added = np.clip(runmax - np.maximum(s, previous), 0, None)
+    return np.bincount(groups[order], weights=added, minlength=n_groups).astype(np.int64)
+
+class MonthIntervals:
+    """
+    Month-granular interval engine over the CV rows (format_atomic_data output).
+    Every row covers its start and end months inclusively, stored as the
+    half-open integer range [start, end + 1) of month indices. Durations are
+    unions, so overlapping roles that use the same skill are counted once.
+
+    `ongoing` flags the rows that end "present"; their end follows set_today().
+    """
+    def __init__(self, rows:List[Dict[str, Any]], ongoing:Optional[Sequence[bool]]=None,
+                 today:Optional[datetime]=None):
+        starts = np.array([month_index(r["start_date"]) for r in rows], dtype=np.int64)
+        ends = np.array([month_index(r["end_date"]) for r in rows], dtype=np.int64)
+        # Swapped dates count like months_between does
+        self.starts = np.minimum(starts, ends)
+        self.fixed_ends = np.maximum(starts, ends) + 1
+        self.ongoing = np.asarray(ongoing if ongoing is not None else [False] * len(rows), dtype=bool)
+
+        # Row -> type id
+        self.types = sorted(set(r["type"] for r in rows))
+        type_ids = {t: i for i, t in enumerate(self.types)}
+        self.row_types = np.array([type_ids[r["type"]] for r in rows], dtype=np.int64)
+
+        # (skill, row) incidence pairs, one per distinct skill of a row
+        self.skills = sorted(set(s.strip().lower() for r in rows for s in r["skills"]))
+        self.skill_ids = {s: i for i, s in enumerate(self.skills)}
+        pair_skill, pair_row = [], []
+        for i, r in enumerate(rows):
+            for s in set(s.strip().lower() for s in r["skills"]):
+                pair_skill.append(self.skill_ids[s])
+                pair_row.append(i)
+        self.pair_skill = np.array(pair_skill, dtype=np.int64)
+        self.pair_row = np.array(pair_row, dtype=np.int64)
+
+        self.set_today(today or datetime.today())
+
+    def set_today(self, today:datetime):
+        """
+        Moves the end of the ongoing rows to `today` (inclusive).
+        """
+        # Built fully, then swapped in: concurrent readers never see a half-updated array
+        ends = self.fixed_ends.copy()
+        ends[self.ongoing] = np.maximum(self.starts[self.ongoing], month_index(today)) + 1
+        self.ends = ends
+        self.today = today
+
+    def _clipped(self, rows:np.ndarray, start:Optional[datetime], end:Optional[datetime]):
+        # Restricts the given rows' intervals to the window [start, end] (inclusive months)
+        s = self.starts[rows]
+        e = self.ends[rows]
+        if start is not None:
+            s = np.maximum(s, month_index(start))
+        if end is not None:
+            e = np.minimum(e, month_index(end) + 1)
+        return s, np.maximum(e, s)
+
+    def skill_months(self, start:Optional[datetime]=None, end:Optional[datetime]=None) -> Dict[str, int]:
+        """
+        Union months per skill (optionally within a date window), all skills in one pass.
+        """
+        s, e = self._clipped(self.pair_row, start, end)
+        months = union_lengths(self.pair_skill, s, e, len(self.skills))
+        return dict(zip(self.skills, months.tolist()))
+
+    def type_months(self, start:Optional[datetime]=None, end:Optional[datetime]=None) -> Dict[str, int]:
+        """
+        Union months per chunk type (experience / education / project).
+        """
+        s, e = self._clipped(np.arange(len(self.starts)), start, end)
+        months = union_lengths(self.row_types, s, e, len(self.types))
+        return dict(zip(self.types, months.tolist()))
+
+    def months(self, skill:Optional[str]=None, chunk_type:Optional[str]=None,
+               start:Optional[datetime]=None, end:Optional[datetime]=None) -> int:
+        """
+        Union months of the rows matching a skill and/or a type, within an
+        optional window, e.g. "years of Python between 2018 and 2021".
+        Unknown skills or types give 0.
+        """
+        rows = np.arange(len(self.starts))
+        if skill is not None:
+            skill_id = self.skill_ids.get(skill.strip().lower())
+            if skill_id is None:
+                return 0
+            rows = self.pair_row[self.pair_skill == skill_id]
+        if chunk_type is not None:
+            rows = rows[self.row_types[rows] == (self.types.index(chunk_type) if chunk_type in self.types else -1)]
+        s, e = self._clipped(rows, start, end)
+        return int(union_lengths(np.zeros(len(rows), dtype=np.int64), s, e, 1)[0])
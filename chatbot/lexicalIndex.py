@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 15:12:26 2026
+
+@author: tienn
+"""
+import re
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+# Keeps skill-like tokens whole: "c++", "c#", "node.js", "ci/cd" -> "ci", "cd"
+_TOKEN = re.compile(r"[a-z0-9+#]+(?:[.\-][a-z0-9+#]+)*")
+
+STOPWORDS = frozenset("""a an and are as at be by did do does for from had has have how i in is it
+me my of on or so that the to was were what when where which who with you your""".split())
+
+def tokenize(text:str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the chunk texts, used as a cheap first stage
+    before dense scoring. Postings are stored CSR-style (one flat array of
+    documents and one of precomputed BM25 term weights per term), so scoring
+    a query only touches the postings of its terms: no per-document loop.
+
+    Terms found in more than `max_df` of the documents are skipped at query
+    time; their IDF is close to zero and their postings are the longest.
+    """
+    def __init__(self, texts:Sequence[str], k1:float=1.2, b:float=0.75, max_df:float=0.5):
+        self.n_docs = len(texts)
+        self.max_df = max_df
+
+        # 1. Every token of every document as a (term id, document) pair
+        self.vocabulary = {}
+        tokens = [[self.vocabulary.setdefault(t, len(self.vocabulary)) for t in tokenize(text)] for text in texts]
+        lengths = np.array([len(t) for t in tokens], dtype=np.float32)
+        avg_length = float(lengths.mean()) if self.n_docs and lengths.sum() else 1.0
+        terms = np.fromiter((t for doc in tokens for t in doc), dtype=np.int64, count=int(lengths.sum()))
+        docs = np.repeat(np.arange(self.n_docs, dtype=np.int64), lengths.astype(np.int64))
+
+        # 2. Term frequencies: one sorted unique over the pairs, grouped by term then document
+        pairs, tf_counts = np.unique(terms * max(self.n_docs, 1) + docs, return_counts=True)
+        pair_terms = pairs // max(self.n_docs, 1)
+        self.doc_ids = pairs % max(self.n_docs, 1)
+        tfs = tf_counts.astype(np.float32)
+
+        # 3. Flat CSR arrays, BM25 weight of every (term, document) pair
+        self.doc_freq = np.bincount(pair_terms, minlength=len(self.vocabulary))
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(self.doc_freq, out=self.indptr[1:])
+        idf = np.log1p((self.n_docs - self.doc_freq + 0.5) / (self.doc_freq + 0.5)).astype(np.float32)
+        norm = k1 * (1.0 - b + b * lengths[self.doc_ids] / avg_length)
+        self.weights = np.repeat(idf, self.doc_freq) * tfs * (k1 + 1.0) / (tfs + norm)
+
+    def __len__(self):
+        return self.n_docs
+
+    def query_terms(self, text:str) -> List[int]:
+        """
+        Distinct indexed terms of the query, without the overly common ones.
+        """
+        limit = self.max_df * self.n_docs
+        terms = {self.vocabulary.get(t) for t in tokenize(text)}
+        return [t for t in terms if t is not None and self.doc_freq[t] <= limit]
+
+    def scores(self, text:str) -> np.ndarray:
+        """
+        BM25 score of every document, shape (n_docs,). 0 for documents sharing no term with the query.
+        """
+        terms = self.query_terms(text)
+        if not terms:
+            return np.zeros(self.n_docs, dtype=np.float32)
+        docs = np.concatenate([self.doc_ids[self.indptr[t]:self.indptr[t + 1]] for t in terms])
+        weights = np.concatenate([self.weights[self.indptr[t]:self.indptr[t + 1]] for t in terms])
+        return np.bincount(docs, weights=weights, minlength=self.n_docs).astype(np.float32)
+
+    def shortlist(self, text:str, size:int, rows:Optional[Sequence[int]]=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Up to `size` documents (among `rows`, default all) with the best
+        positive BM25 scores, as (indices, scores) in no particular order.
+        """
+        scores = self.scores(text)
+        if rows is None:
+            matched = np.flatnonzero(scores > 0)
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            matched = rows[scores[rows] > 0]
+        if len(matched) > size:
+            matched = matched[np.argpartition(-scores[matched], size - 1)[:size]]
+        return matched, scores[matched]
+
+def fuse_scores(dense:np.ndarray, lexical:np.ndarray, lexical_weight:float) -> np.ndarray:
+    """
+    Convex combination of the cosine scores and the BM25 scores rescaled to
+    [0, 1] by the best one of the shortlist, so the result stays on the
+    cosine scale the rest of the pipeline expects.
+    """
+    best = float(lexical.max()) if len(lexical) else 0.0
+    lexical = lexical / best if best > 0 else lexical
+    return (1.0 - lexical_weight) * dense + lexical_weight * lexical
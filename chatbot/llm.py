@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 03:48:05 2026
+
+@author: tienn
+"""
+from typing import Dict, Any, List, Optional
+
+LLM_MODEL = "openai/gpt-oss-120b"
+
+FAKE_RESPONSE = "This is a local test answer generated without calling the LLM provider."
+
+def build_groq_llm(api_key:str):
+    # Imported here so the pipeline and the offline fake do not require the provider package
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        model=LLM_MODEL,
+        # temperature=0,
+        api_key=api_key
+    )
+
+def build_fake_llm(responses:Optional[List[str]]=None, sleep:Optional[float]=None):
+    """
+    Offline stand-in for the Groq model: cycles through `responses`, supports
+    invoke/ainvoke/stream/astream, and can simulate per-token latency with `sleep`.
+    """
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    return FakeListChatModel(responses=responses or [FAKE_RESPONSE], sleep=sleep)
+
+def build_llm(backend:str="groq", api_key:Optional[str]=None):
+    """
+    Pluggable LLM backend: "groq" (needs api_key) or "fake" (local, offline).
+    """
+    if backend == "groq":
+        if not api_key:
+            raise ValueError("The 'groq' backend needs an API key.")
+        return build_groq_llm(api_key)
+    elif backend == "fake":
+        return build_fake_llm()
+    raise ValueError(f"Unknown LLM backend: {backend}")
+
+def build_chain(llm):
+    # langchain is only needed once a chain is built, not to import the pipeline
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "{system_promt}"),
+        ("user", "{question}")
+    ])
+
+    return prompt | llm | StrOutputParser()
+
+def build_llm_inputs(results:Dict[str, Any]) -> Dict[str, str]:
+    """
+    Maps a successful CVOrchestrator.handle_query result to the chain inputs.
+    """
+    return {
+        "system_promt" : results['system_prompt'],
+        "question" : results['user_query']
+    }
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 06:20:33 2026
+
+@author: tienn
+"""
+import json
+import time
+import bisect
+import logging
+import threading
+from typing import Dict, Any, Optional, Sequence
+
+trace_logger = logging.getLogger("chatbot.trace")
+
+# Upper bounds (ms) of the latency histogram buckets, the last bucket is +Inf
+DEFAULT_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (milliseconds).
+    """
+    def __init__(self, buckets:Sequence[float]=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value_ms:float):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+
+    def quantile(self, q:float) -> Optional[float]:
+        """
+        Upper bound of the bucket holding the q-quantile (None if empty or past the last bound).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": self.count,
+                "sum_ms": round(self.total, 4),
+                "mean_ms": round(self.total / self.count, 4) if self.count else None,
+                "p50_ms": self.quantile(0.5),
+                "p95_ms": self.quantile(0.95),
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts))}
+
+class _NullTimer:
+    """
+    Shared no-op timer handed out when instrumentation is disabled.
+    """
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+NULL_TIMER = _NullTimer()
+
+class _StageTimer:
+    """
+    Times a block and reports it to `sink.record(stage, elapsed_ms)`.
+    """
+    __slots__ = ("sink", "stage", "start")
+    def __init__(self, sink, stage):
+        self.sink = sink
+        self.stage = stage
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        self.sink.record(self.stage, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+class RequestTrace:
+    """
+    Stage timings of one request. Created by PipelineMetrics.start_trace and
+    carried on the QueryContext.
+    """
+    __slots__ = ("stages", "start")
+    def __init__(self):
+        self.stages = {}
+        self.start = time.perf_counter()
+
+    def timer(self, stage:str) -> _StageTimer:
+        return _StageTimer(self, stage)
+
+    def record(self, stage:str, elapsed_ms:float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + elapsed_ms
+
+class PipelineMetrics:
+    """
+    Process-level metrics for the query pipeline: one latency histogram per
+    stage plus counters. With enabled=False every hook is a no-op (no trace
+    object, shared null timer). With trace=True each finished request is
+    also logged as one JSON line on the "chatbot.trace" logger.
+    """
+    def __init__(self, enabled:bool=True, trace:bool=False, buckets:Sequence[float]=DEFAULT_BUCKETS_MS):
+        self.enabled = enabled
+        self.trace = trace
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def start_trace(self) -> Optional[RequestTrace]:
+        return RequestTrace() if self.enabled else None
+
+    def incr(self, name:str, value:int=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage:str, elapsed_ms:float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.buckets)
+            histogram.observe(elapsed_ms)
+
+    # Lets a PipelineMetrics be the sink of a _StageTimer
+    record = observe
+
+    def timer(self, stage:str):
+        """
+        Times a block straight into the stage histogram (for work outside a request trace).
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return _StageTimer(self, stage)
+
+    def finish(self, trace:Optional[RequestTrace], status:str, **fields):
+        """
+        Folds a request's stage timings into the histograms and counts it by status.
+        """
+        if trace is None:
+            return
+        total_ms = (time.perf_counter() - trace.start) * 1000.0
+        with self._lock:
+            for stage, elapsed_ms in list(trace.stages.items()) + [("pipeline_total", total_ms)]:
+                histogram = self.histograms.get(stage)
+                if histogram is None:
+                    histogram = self.histograms[stage] = Histogram(self.buckets)
+                histogram.observe(elapsed_ms)
+            key = f"requests_{status}"
+            self.counters[key] = self.counters.get(key, 0) + 1
+        if self.trace:
+            record = {"status": status, "total_ms": round(total_ms, 4),
+                      "stages": {k: round(v, 4) for k, v in trace.stages.items()}}
+            record.update(fields)
+            trace_logger.info(json.dumps(record, default=str))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled,
+                    "counters": dict(self.counters),
+                    "histograms": {k: h.snapshot() for k, h in self.histograms.items()}}
+
+    def render_prometheus(self, prefix:str="cv_chatbot") -> str:
+        """
+        Prometheus text exposition of the same data.
+        """
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                lines.append(f"{prefix}_{name} {value}")
+            lines.append(f"# TYPE {prefix}_stage_latency_ms histogram")
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_stage_latency_ms_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_latency_ms_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{prefix}_stage_latency_ms_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+def timed_stream(metrics:PipelineMetrics, tokens):
+    """
+    Wraps an LLM token stream, recording time-to-first-token and total generation time.
+    """
+    if not metrics.enabled:
+        yield from tokens
+        return
+    start = time.perf_counter()
+    first = True
+    for token in tokens:
+        if first:
+            metrics.observe("llm_ttft", (time.perf_counter() - start) * 1000.0)
+            first = False
+        yield token
+    metrics.observe("llm_total", (time.perf_counter() - start) * 1000.0)
@@ -7,33 +7,92 @@ Created on Fri Dec 12 21:58:13 2025
 """
 from chatbot.guardrailRouter import CVGuardrailRouter
 from chatbot.retrievalEngine import CVRetrievalEngine
-from chatbot.utils import total_experience_years, compute_skill_experience, format_atomic_data, format_years
-from sentence_transformers import SentenceTransformer, util
+from chatbot.queryContext import QueryContext
+from chatbot.responseCache import QueryResultCache, normalize_query, context_key
+from chatbot.llm import build_llm_inputs, build_chain, build_fake_llm
+from chatbot.metrics import PipelineMetrics
+from chatbot.factTable import FactTable
+from chatbot.contextPacker import ContextPacker, estimate_tokens, format_snippet
+from chatbot.utils import format_years, load_data
+from chatbot.encoders import load_embedding_model
+from tools.secure_container import SecureContainer
+import json
+import hashlib
+import asyncio
+import argparse
+import logging
 from typing import List, Dict, Any, Tuple
 
+logger = logging.getLogger(__name__)
+
+# Same rules as the original prompt, without the indentation and the long-form wording
+COMPACT_PROMPT = """You represent a candidate. Answer ONLY from the context below.
+Intent: {intent}
+Key facts (exact numbers):
+{facts}
+CV snippets:
+{snippets}
+Rules: be accurate; cite the years in Key facts explicitly; use the snippets as evidence; \
+if the answer is not in the context, reply "I couldn't find specific details about that in the CV."; \
+never invent or assume; be professional and concise."""
+
 class CVOrchestrator:
-    def __init__(self, anchors, database, contacts):
+    def __init__(self, anchors, database, contacts, embedding_model=None, embedding_store=None,
+                 query_cache_size=512, query_encoder=None, metrics=None, index_precision="float32",
+                 router_mode="exhaustive", router=None, data_version=None, lexical_prefilter=False,
+                 context_budget=400, compact_prompt=True):
         self.cv_data = database # The "Database" for Math (Step 3)
         self.anchors = anchors
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.router = CVGuardrailRouter(self.embedding_model, self.anchors) # The "Bouncer" (Step 1)
-        self.retriever = CVRetrievalEngine(self.embedding_model, self.cv_data) # The "Librarian" (Step 2)
-        formated_data = format_atomic_data(self.cv_data)
-        self.skills_data = compute_skill_experience(formated_data)
-        self.experience_data = [data for data in formated_data if data['type'] == "experience"]
+        # The model can be injected so that it is shared across rebuilds/sessions
+        self.embedding_model = embedding_model if embedding_model is not None else load_embedding_model()
+        # Per-request query encodes go through this (e.g. a shared BatchingEncoder), defaults to the model
+        self.query_encoder = query_encoder if query_encoder is not None else self.embedding_model
+        # Per-stage latency histograms and counters (disabled unless given)
+        self.metrics = metrics if metrics is not None else PipelineMetrics(enabled=False)
+        # index_precision: "float32", or "float16"/"int8" for 2-4x smaller embedding matrices
+        # router_mode: "exhaustive", or "centroid" to probe per-intent centroids before the anchors
+        # A router built elsewhere can be passed in (e.g. one anchor index shared by every profile)
+        if router is None:
+            router = CVGuardrailRouter(self.embedding_model, self.anchors, embedding_store, index_precision,
+                                       mode=router_mode)
+        self.router = router # The "Bouncer" (Step 1)
+        # lexical_prefilter: BM25 shortlist ahead of the dense scoring (large databases)
+        self.retriever = CVRetrievalEngine(self.embedding_model, self.cv_data, embedding_store, index_precision,
+                                           lexical=lexical_prefilter) # The "Librarian" (Step 2)
+        # Snippets packed into the prompt within context_budget tokens (None: every snippet, as retrieved)
+        self.context_packer = ContextPacker(context_budget) if context_budget else None
+        self.compact_prompt = compact_prompt
+        # Skill months / total years precomputed once, "present" roles refreshed hourly
+        self.facts = FactTable(self.cv_data)
         self.email_add = contacts["email_add"]
         self.phone_num = contacts["phone_num"]
+
+        # Exact-match memo of handle_query, stamped with the version of the data it was built from
+        # (the build manifest's version when known, it also changes exactly when the content does)
+        self.db_version = data_version or self.compute_version(anchors, database, contacts)
+        self.query_cache = QueryResultCache(max_entries=query_cache_size)
+
+    @staticmethod
+    def compute_version(anchors, database, contacts) -> str:
+        # Open containers are not decrypted again for this: their file fingerprint stands in
+        payload = json.dumps([anchors, database, contacts], sort_keys=True,
+                             default=lambda o: o.fingerprint if isinstance(o, SecureContainer) else str(o))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
         
-    def fact_eject(self, intent:str, user_query:str) -> List[str]:
+    def fact_eject(self, intent:str, user_query:str, query_context:QueryContext=None) -> List[str]:
         facts = []
         if intent == "skills":
-            # Re-use the retriever's skill set to find keywords
-            detected_skills = [s for s in self.retriever.all_known_skills if s in user_query.lower()]
+            # Re-use the retriever's skill matcher (word boundaries: "c" does not match "react")
+            detected_skills = self.retriever.detect_skills(user_query, query_context)
             
             for skill_name in detected_skills:
-                facts.append(f"- Total experience with {skill_name}: {format_years(self.skills_data.get(skill_name)['months'])} years.")
+                months = self.facts.get_skill_months(skill_name)
+                if months is None:
+                    logger.debug("No experience data for skill '%s'", skill_name)
+                    continue
+                facts.append(f"- Total experience with {skill_name}: {format_years(months)} years.")
         elif intent == "experience":
-            facts.append(f"- Total years of professional experience: {total_experience_years(self.experience_data)} years.")
+            facts.append(f"- Total years of professional experience: {self.facts.get_total_years()} years.")
         elif intent == "contact":
             facts.append(f"- Email address: {self.email_add}.")
             facts.append(f"- Phone number: {self.phone_num}.")
@@ -42,10 +101,53 @@ class CVOrchestrator:
     def handle_query(self, user_query):
         """
         Full pipeline: Guardrail -> Skill Check -> Retrieval -> Prompt
+        Repeated questions (same text up to case/whitespace) are served from the memo.
         """
-        
+        key = normalize_query(user_query)
+        # Prompts embed the facts: a "present" refresh that changed them also invalidates
+        self.facts.refresh()
+        version = (self.db_version, self.facts.revision)
+        trace = self.metrics.start_trace()
+        cached = self.query_cache.get(key, version)
+        if cached is not None:
+            self.metrics.incr("query_cache_hits")
+            result = dict(cached)
+            if "user_query" in result:
+                result["user_query"] = user_query
+            # Hits are requests too: counted by status and in pipeline_total like the uncached ones
+            self.finish_request(trace, result, intent=result.get('intent'), cached=True)
+            return result
+
+        result = self.run_pipeline(user_query, trace)
+        self.query_cache.put(key, version, result)
+        return dict(result)
+
+    def run_pipeline(self, user_query, trace=None):
+        """
+        Uncached pipeline: Guardrail -> Skill Check -> Retrieval -> Prompt
+        """
+        # One context per request: the query is encoded once and shared by every phase,
+        # and the stage timings are collected on its trace (handle_query's, when called from there)
+        if trace is None:
+            trace = self.metrics.start_trace()
+        query_context = QueryContext(user_query, self.query_encoder, trace=trace)
+        result = self.run_phases(user_query, query_context)
+        self.finish_request(trace, result, intent=query_context.intent, cached=False)
+        return result
+
+    def finish_request(self, trace, result, intent, cached):
+        """
+        Records one handled request (memo hit or pipeline run) in the metrics.
+        """
+        if result['status'] == "success":
+            self.metrics.incr("prompt_tokens", result['prompt_tokens'])
+            self.metrics.incr("prompt_tokens_saved", result['prompt_tokens_saved'] or 0)
+        self.metrics.finish(trace, result['status'], intent=intent, cached=cached,
+                            prompt_tokens_saved=result.get('prompt_tokens_saved'))
+
+    def run_phases(self, user_query, query_context):
         # --- PHASE 1: GUARDRAIL (The Router) ---
-        route_result = self.router.route_query(user_query)
+        route_result = self.router.route_query(user_query, query_context=query_context)
         
         # If the router says "Block", we stop immediately.
         # This saves API costs and prevents jailbreaks.
@@ -55,15 +157,17 @@ class CVOrchestrator:
                 "response": "I can only answer questions about my professional profile, skills, and work experience."
             }
 
-        print(f"✅ Intent Allowed: {route_result['intent']}")
+        logger.debug("Intent Allowed: %s", route_result['intent'])
 
         # --- PHASE 2: SKILL CALCULATION (The Fact Injector) ---
         # We detect skills regardless of the intent (unless it's purely 'contact')
-        quantitative_facts = self.fact_eject(route_result['intent'], user_query)
+        with query_context.timer("fact_injection"):
+            quantitative_facts = self.fact_eject(route_result['intent'], user_query, query_context)
 
         # --- PHASE 3: RETRIEVAL (The Semantic Search) ---
         # We fetch text chunks based on the query
-        search_results = self.retriever.search(user_query, route_result['intent'], top_k=5)
+        search_results = self.retriever.search(user_query, route_result['intent'], top_k=5,
+                                               query_context=query_context)
         
         # --- PHASE 4: PROMPT ASSEMBLY ---
         # If no results found and no skills detected, we might need a fallback
@@ -73,18 +177,57 @@ class CVOrchestrator:
                 "response": "I couldn't find specific details about that in the CV, but I can tell you about my general background."
             }
 
+        with query_context.timer("context_packing"):
+            snippets = self.pack_context(search_results)
+
+        with query_context.timer("prompt_assembly"):
+            system_prompt = self.assemble_prompt(route_result['intent'], quantitative_facts, snippets)
+            prompt_tokens = estimate_tokens(system_prompt)
+            # Saved: against every retrieved snippet in the original, verbose prompt.
+            # Only a metric, so the verbose prompt is not rebuilt when metrics are off
+            prompt_tokens_saved = None
+            if self.metrics.enabled:
+                unpacked_tokens = estimate_tokens(self.assemble_prompt(route_result['intent'], quantitative_facts,
+                                                                       [format_snippet(r) for r in search_results],
+                                                                       compact=False))
+                prompt_tokens_saved = max(unpacked_tokens - prompt_tokens, 0)
+
+        return {
+            "status": "success",
+            "system_prompt": system_prompt,
+            "user_query": user_query,
+            "intent": route_result['intent'],
+            "prompt_tokens": prompt_tokens,
+            "prompt_tokens_saved": prompt_tokens_saved,
+            # Same facts, snippets and skills asked about <=> same key
+            "cache_key": context_key(system_prompt, self.retriever.detect_skills(user_query, query_context)),
+            "query_embedding": query_context.embedding # Key for the semantic response cache
+        }
+
+    def pack_context(self, search_results:List[Dict[str, Any]]) -> List[str]:
+        """
+        Snippet lines for the prompt: low-score and near-duplicate results dropped, within the token budget.
+        """
+        if self.context_packer is None:
+            return [format_snippet(r) for r in search_results]
+        return self.context_packer.pack(search_results, self.retriever.result_vectors(search_results))
+
+    def assemble_prompt(self, intent:str, quantitative_facts:List[str], snippets:List[str], compact:bool=None) -> str:
         # Format the context
-        context_text = "\n".join([f"- [{r['context']}]: {r['content']}" for r in search_results])
+        context_text = "\n".join(snippets)
         facts_text = "\n".join(quantitative_facts) if quantitative_facts else "No specific quantitative data for this query."
 
-        print(context_text)
-        
+        logger.debug("Context:\n%s", context_text)
+
+        if self.compact_prompt if compact is None else compact:
+            return COMPACT_PROMPT.format(intent=intent.upper(), facts=facts_text, snippets=context_text)
+
         # Final System Prompt
         system_prompt = f"""
         You are an AI assistant representing a candidate. Answer the user's question based ONLY on the context below.
         
         === USER INTENT ===
-        The user is asking about: {route_result['intent'].upper()}
+        The user is asking about: {intent.upper()}
         
         === KEY FACTS (Immutable Numbers) ===
         {facts_text}
@@ -100,9 +243,61 @@ class CVOrchestrator:
         5. Do not fabricate information or make assumptions beyond the given data.
         6. Maintain a professional and concise tone.
         """
+        return system_prompt
 
-        return {
-            "status": "success",
-            "system_prompt": system_prompt,
-            "user_query": user_query
-        }
+    async def ahandle_query(self, user_query, executor=None):
+        """
+        Async counterpart of handle_query. Encoding and scoring are CPU-bound,
+        so they run in an executor instead of blocking the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.handle_query, user_query)
+
+    def answer(self, user_query, chain) -> Dict[str, Any]:
+        """
+        Pipeline + LLM call. Blocked / no-data queries never reach the LLM.
+        """
+        results = self.handle_query(user_query)
+        if results['status'] != "success":
+            return {"status": results['status'], "response": results['response']}
+        with self.metrics.timer("llm_total"):
+            response = chain.invoke(build_llm_inputs(results))
+        return {"status": "success", "response": response}
+
+    async def aanswer(self, user_query, chain, executor=None) -> Dict[str, Any]:
+        """
+        Async counterpart of answer: awaits the chain's async interface so one
+        event loop can serve many conversations concurrently.
+        """
+        results = await self.ahandle_query(user_query, executor)
+        if results['status'] != "success":
+            return {"status": results['status'], "response": results['response']}
+        with self.metrics.timer("llm_total"):
+            response = await chain.ainvoke(build_llm_inputs(results))
+        return {"status": "success", "response": response}
+
+# --- Usage Example ---
+async def run_concurrent(orchestrator, chain, queries):
+    return await asyncio.gather(*(orchestrator.aanswer(q, chain) for q in queries))
+
+def main(anchors_path:str, db_path:str):
+    # Offline: local fake LLM with a small simulated per-token latency
+    chain = build_chain(build_fake_llm(sleep=0.01))
+    orchestrator = CVOrchestrator(anchors=load_data(anchors_path), database=load_data(db_path),
+                                  contacts={"email_add": "test@example.com", "phone_num": "000"})
+
+    queries = [
+        "How many years of experience you have with Python?",
+        "Tell me about your time at Google.",
+        "Write me a poem about cats.",
+        "How do I email you?"
+    ]
+    for query, result in zip(queries, asyncio.run(run_concurrent(orchestrator, chain, queries))):
+        print(f"[{result['status']}] {query} -> {result['response']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-a", "--anchors_path", type=str, default='anchors.json')
+    parser.add_argument("-i", "--input_path", type=str, default='cv_atomic_db.json')
+    args = parser.parse_args()
+    main(args.anchors_path, args.input_path)
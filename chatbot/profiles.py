@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:04:51 2026
+
+@author: tienn
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from chatbot.orchestrator import CVOrchestrator
+from chatbot.guardrailRouter import CVGuardrailRouter
+from chatbot.encoders import load_embedding_model, MODEL_NAME
+from chatbot.embeddingStore import EmbeddingStore
+from chatbot.batchEncoder import BatchingEncoder
+from chatbot.responseCache import SemanticResponseCache
+from chatbot.llm import build_chain, build_llm
+from chatbot.metrics import PipelineMetrics
+from chatbot.resources import DEFAULT_PATHS, files_version, data_version, load_manifest, prefer_container
+from tools.secure_container import load_encrypted, open_encrypted
+from typing import Dict, Any, List, Optional
+
+# Per-profile files, inside <profiles_dir>/<profile_id>/
+PROFILE_FILES = {"data_path": "cv_atomic_db.pkl",
+                 "contacts_path": "contacts.pkl"}
+
+_PROFILE_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+class ProfileRegistry:
+    """
+    Serves many candidates' bots from one process. The embedding model, the
+    on-disk embedding store, the batching query encoder, the LLM chain, the
+    metrics and the routing anchor index are built once and shared by every
+    profile. A profile only holds its own retrieval index, skill statistics,
+    contacts and response cache. Its float32 vectors are a view of the shared
+    memory-mapped store when its rows are contiguous there (e.g. a profile
+    encoded in one go); otherwise, as when it shares texts with another
+    profile, they are gathered into a copy. Profiles are decrypted and indexed on first use, and the
+    least recently used ones are dropped beyond `max_profiles`.
+
+    Layout:
+        <profiles_dir>/<profile_id>/cv_atomic_db.pkl
+        <profiles_dir>/<profile_id>/contacts.pkl
+        anchors_path                              (shared routing anchors)
+    """
+    def __init__(self, encode_key:str, api_key:str, profiles_dir:str="data/profiles",
+                 anchors_path:str=DEFAULT_PATHS["anchors_path"], max_profiles:int=8,
+                 default_profile:Optional[str]=None, llm_backend:str="groq", query_cache_size:int=128):
+        self.encode_key = encode_key
+        self.api_key = api_key
+        self.profiles_dir = profiles_dir
+        self.anchors_path = anchors_path
+        self.max_profiles = max_profiles
+        self.default_profile = default_profile
+        self.llm_backend = llm_backend
+        self.query_cache_size = query_cache_size
+
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        self._profiles = OrderedDict()  # profile_id -> (version, resources), least recently used first
+        self._model = None
+        self._embedding_store = None
+        self._query_encoder = None
+        self._chain = None
+        self._router = None
+        self._anchors = None
+        self._anchors_version = None
+        # Same environment knobs as SharedResources
+        self.metrics = PipelineMetrics(enabled=os.environ.get("CV_METRICS") == "1",
+                                       trace=os.environ.get("CV_TRACE") == "1")
+        self.index_precision = os.environ.get("CV_INDEX_PRECISION", "float32")
+        self.router_mode = os.environ.get("CV_ROUTER_MODE", "exhaustive")
+        self.lexical_prefilter = os.environ.get("CV_LEXICAL_PREFILTER") == "1"
+        self.context_budget = int(os.environ.get("CV_CONTEXT_BUDGET", "400"))
+
+    def profile_paths(self, profile_id:str) -> Dict[str, str]:
+        if not profile_id or not _PROFILE_ID.match(profile_id):
+            raise ValueError(f"Invalid profile id '{profile_id}'")
+        directory = os.path.join(self.profiles_dir, profile_id)
+        return {name: os.path.join(directory, filename) for name, filename in PROFILE_FILES.items()}
+
+    def available_profiles(self) -> List[str]:
+        if not os.path.isdir(self.profiles_dir):
+            return []
+        return sorted(name for name in os.listdir(self.profiles_dir)
+                      if _PROFILE_ID.match(name)
+                      and all(os.path.exists(prefer_container(p)) for p in self.profile_paths(name).values()))
+
+    def warm(self):
+        """
+        Builds the shared parts (model, store, encoder, chain, router) ahead of the first request.
+        """
+        self._shared()
+
+    def _shared(self):
+        """
+        Returns (router, anchors, anchors version). The router is rebuilt when
+        the anchors file changes; the model and the chain never depend on data.
+        """
+        anchors_path = prefer_container(self.anchors_path)
+        version = files_version(anchors_path)
+        with self._lock:
+            if self._router is not None and version == self._anchors_version:
+                return self._router, self._anchors, self._anchors_version
+
+            if self._model is None:
+                self._model = load_embedding_model(MODEL_NAME)
+                # One content-addressed store for every profile: identical texts are embedded once
+                self._embedding_store = EmbeddingStore(self.profiles_dir, self._model, MODEL_NAME)
+                self._query_encoder = BatchingEncoder(self._model)
+            if self._chain is None:
+                self._chain = build_chain(build_llm(self.llm_backend, self.api_key))
+
+            self._anchors = load_encrypted(anchors_path, self.encode_key)
+            self._router = CVGuardrailRouter(self._model, self._anchors, self._embedding_store,
+                                             self.index_precision, mode=self.router_mode)
+            self._anchors_version = version
+            # Every loaded profile was routed with the old anchors
+            self._profiles.clear()
+            return self._router, self._anchors, self._anchors_version
+
+    def _build(self, profile_id:str, paths:Dict[str, str], router, anchors, version) -> Dict[str, Any]:
+        manifest = load_manifest(os.path.dirname(paths["data_path"]))
+        orchestrator = CVOrchestrator(anchors=anchors,
+                                      database=open_encrypted(prefer_container(paths["data_path"]), self.encode_key),
+                                      contacts=open_encrypted(prefer_container(paths["contacts_path"]), self.encode_key),
+                                      embedding_model=self._model,
+                                      embedding_store=self._embedding_store,
+                                      query_cache_size=self.query_cache_size,
+                                      query_encoder=self._query_encoder,
+                                      metrics=self.metrics,
+                                      index_precision=self.index_precision,
+                                      router=router,
+                                      data_version=manifest["version"] if manifest else None,
+                                      lexical_prefilter=self.lexical_prefilter,
+                                      context_budget=self.context_budget)
+        print(f"Profile '{profile_id}' loaded ({len(orchestrator.cv_data)} facts).")
+        return {"orchestrator": orchestrator,
+                "chain": self._chain,
+                "response_cache": SemanticResponseCache(),
+                "metrics": self.metrics,
+                "data_version": version,
+                "profile": profile_id}
+
+    def get(self, profile_id:Optional[str]=None) -> Dict[str, Any]:
+        """
+        Resources of one profile, same keys as SharedResources.get() plus
+        "profile". Loads the profile on first use, reloads it when its files
+        (or the shared anchors) changed, and evicts the least recently used
+        profile when more than `max_profiles` are loaded.
+        """
+        profile_id = profile_id or self.default_profile
+        paths = self.profile_paths(profile_id)
+        router, anchors, anchors_version = self._shared()
+        version = (anchors_version, data_version(paths))
+
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+            if entry is not None and entry[0] == version:
+                self._profiles.move_to_end(profile_id)
+                return entry[1]
+            build_lock = self._build_locks.setdefault(profile_id, threading.Lock())
+
+        # Only requests for the same profile wait on its build, other profiles keep being served
+        with build_lock:
+            with self._lock:
+                entry = self._profiles.get(profile_id)
+                if entry is not None and entry[0] == version:
+                    self._profiles.move_to_end(profile_id)
+                    return entry[1]
+
+            resources = self._build(profile_id, paths, router, anchors, version)
+
+            with self._lock:
+                self._profiles[profile_id] = (version, resources)
+                self._profiles.move_to_end(profile_id)
+                while len(self._profiles) > self.max_profiles:
+                    evicted, _ = self._profiles.popitem(last=False)
+                    print(f"Profile '{evicted}' evicted.")
+            return resources
+
+    def evict(self, profile_id:str):
+        with self._lock:
+            self._profiles.pop(profile_id, None)
+
+    def invalidate(self):
+        """
+        Drops every loaded profile and the shared router; the model and the chain are kept.
+        """
+        with self._lock:
+            self._profiles.clear()
+            self._router = None
+            self._anchors = None
+            self._anchors_version = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"loaded": list(self._profiles),
+                    "max_profiles": self.max_profiles,
+                    "response_cache": {pid: resources["response_cache"].stats()
+                                       for pid, (_, resources) in self._profiles.items()}}
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 02:05:37 2026
+
+@author: tienn
+"""
+from chatbot.metrics import NULL_TIMER
+
+class QueryContext:
+    """
+    Per-request state carried through every phase of the pipeline
+    (Guardrail -> Fact Injector -> Retrieval -> Prompt).
+    The query is encoded at most once and the result is shared by the
+    router and the retrieval engine.
+    """
+    def __init__(self, user_query, model, trace=None):
+        self.text = user_query
+        self.lower_text = user_query.lower()
+        self.model = model
+        self._embedding = None
+        # RequestTrace collecting per-stage timings, None when instrumentation is off
+        self.trace = trace
+
+        # Filled in by the pipeline phases as they run
+        self.intent = None
+        self.detected_skills = None
+
+    @property
+    def embedding(self):
+        # Encoded on first use (the router), then re-used by every later phase
+        if self._embedding is None:
+            self._embedding = self.model.encode(self.text, convert_to_numpy=True)
+        return self._embedding
+
+    @embedding.setter
+    def embedding(self, vector):
+        # Set by batch encoders (route_queries, evaluation) instead of encoding one by one
+        self._embedding = vector
+
+    @property
+    def is_encoded(self) -> bool:
+        return self._embedding is not None
+
+    def timer(self, stage):
+        """
+        Context manager timing one pipeline stage (a shared no-op without a trace).
+        """
+        if self.trace is None:
+            return NULL_TIMER
+        return self.trace.timer(stage)
+
+    @classmethod
+    def from_embedding(cls, user_query, vector, model=None, trace=None):
+        """
+        Context for a query whose embedding was already computed (e.g. in a batch).
+        """
+        context = cls(user_query, model, trace=trace)
+        context.embedding = vector
+        return context
+
+    @classmethod
+    def ensure(cls, query_context, user_query, model):
+        """
+        Returns the given context, or a fresh one when a phase is called standalone.
+        """
+        if query_context is None:
+            return cls(user_query, model)
+        return query_context
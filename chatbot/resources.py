@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 01:40:12 2026
+
+@author: tienn
+"""
+import os
+import json
+import threading
+from chatbot.orchestrator import CVOrchestrator
+from chatbot.encoders import load_embedding_model, MODEL_NAME
+from chatbot.embeddingStore import EmbeddingStore
+from chatbot.batchEncoder import BatchingEncoder
+from chatbot.responseCache import SemanticResponseCache
+from chatbot.llm import build_chain, build_llm
+from chatbot.metrics import PipelineMetrics
+from tools.secure_container import load_encrypted, open_encrypted, container_path
+from typing import Dict, Any, Tuple, Optional
+
+DEFAULT_PATHS = {"anchors_path": "data/anchors.pkl",
+                 "data_path": "data/cv_atomic_db.pkl",
+                 "contacts_path": "data/contacts.pkl"}
+
+def prefer_container(path:str) -> str:
+    """
+    The legacy pickle or the .cvc container next to it, whichever was written
+    last: a conversion supersedes the pickle, and a later pickle build
+    supersedes the conversion. Resolved on every load, not once per process.
+    """
+    container = container_path(path)
+    if not path.endswith(".pkl") or not os.path.exists(container):
+        return path
+    if os.path.exists(path) and os.path.getmtime(path) > os.path.getmtime(container):
+        return path
+    return container
+
+def load_encrypted_data(encode_key:str, anchors_path:str, data_path:str, contacts_path:str) -> Dict[str,Any]:
+    # .pkl files are decrypted in one piece. The anchors are all encoded anyway, while
+    # the database and the contacts stay in their (lazily decrypted) .cvc containers
+    anchors = load_encrypted(anchors_path, encode_key)
+    data = open_encrypted(data_path, encode_key)
+    contacts = open_encrypted(contacts_path, encode_key)
+
+    return {"anchors" : anchors,
+            "database" : data,
+            "contacts" : contacts}
+
+# Written last by tools/build_cv.py, next to the encrypted files
+MANIFEST_NAME = "manifest.json"
+
+def files_version(*paths) -> Tuple:
+    """
+    Cheap fingerprint of the data files (mtime + size). Used to detect that
+    the encrypted pickles were rebuilt while the process is running.
+    """
+    return tuple((os.path.getmtime(p), os.path.getsize(p)) for p in paths)
+
+def load_manifest(directory:str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def data_version(paths:Dict[str, str]) -> Tuple:
+    """
+    Fingerprint watched for rebuilds: the build manifest when there is one
+    (it is only rewritten when the content changed, so one stat is enough),
+    else every data file.
+    """
+    manifest = os.path.join(os.path.dirname(paths["data_path"]), MANIFEST_NAME)
+    if os.path.exists(manifest):
+        return files_version(manifest)
+    return files_version(*(prefer_container(p) for p in paths.values()))
+
+class SharedResources:
+    """
+    Process-wide warm start: the decrypted data, the embedding model, the
+    CVOrchestrator and the LLM chain are built once and then served to every
+    session. Streamlit re-runs the script on each message but keeps imported
+    modules alive, so holding them here survives the reruns.
+    """
+    def __init__(self, encode_key:str, api_key:str, anchors_path:str, data_path:str, contacts_path:str,
+                 llm_backend:str="groq"):
+        self.encode_key = encode_key
+        self.api_key = api_key
+        self.llm_backend = llm_backend
+        self.paths = {"anchors_path": anchors_path,
+                      "data_path": data_path,
+                      "contacts_path": contacts_path}
+        self._lock = threading.Lock()
+        self._model = None
+        self._embedding_store = None
+        self._query_encoder = None
+        self._chain = None
+        # Kept for the life of the process so hit/miss counts survive data reloads
+        self.response_cache = SemanticResponseCache()
+        # Per-stage latency metrics, off unless CV_METRICS=1 (CV_TRACE=1 also logs one line per request)
+        self.metrics = PipelineMetrics(enabled=os.environ.get("CV_METRICS") == "1",
+                                       trace=os.environ.get("CV_TRACE") == "1")
+        # Embedding matrix precision: float32 (default), float16 or int8
+        self.index_precision = os.environ.get("CV_INDEX_PRECISION", "float32")
+        # Intent routing: exhaustive (default) or centroid (for large anchor sets)
+        self.router_mode = os.environ.get("CV_ROUTER_MODE", "exhaustive")
+        # BM25 shortlist before dense retrieval, off unless CV_LEXICAL_PREFILTER=1 (large databases)
+        self.lexical_prefilter = os.environ.get("CV_LEXICAL_PREFILTER") == "1"
+        # Token budget of the retrieved snippets in the prompt, CV_CONTEXT_BUDGET=0 sends them all
+        self.context_budget = int(os.environ.get("CV_CONTEXT_BUDGET", "400"))
+        self._resources = None
+        self._version = None
+
+    def _build(self, version:Tuple) -> Dict[str, Any]:
+        # The model and the chain do not depend on the data files, keep them across reloads
+        if self._model is None:
+            self._model = load_embedding_model(MODEL_NAME)
+            # Vectors are cached next to the CV database and re-used across restarts
+            self._embedding_store = EmbeddingStore(os.path.dirname(self.paths["data_path"]),
+                                                   self._model, MODEL_NAME)
+            # Concurrent sessions' query encodes are coalesced into batches
+            self._query_encoder = BatchingEncoder(self._model)
+        if self._chain is None:
+            self._chain = build_chain(build_llm(self.llm_backend, self.api_key))
+
+        # .pkl or .cvc, whichever the last build / conversion wrote
+        inputs = load_encrypted_data(self.encode_key,
+                                     **{name: prefer_container(path) for name, path in self.paths.items()})
+        # Content version from the build manifest, when there is one (no need to hash the data again)
+        manifest = load_manifest(os.path.dirname(self.paths["data_path"]))
+        content_version = manifest["version"] if manifest else None
+        orchestrator = CVOrchestrator(**inputs, embedding_model=self._model,
+                                      embedding_store=self._embedding_store,
+                                      query_encoder=self._query_encoder,
+                                      metrics=self.metrics,
+                                      index_precision=self.index_precision,
+                                      router_mode=self.router_mode,
+                                      data_version=content_version,
+                                      lexical_prefilter=self.lexical_prefilter,
+                                      context_budget=self.context_budget)
+        # Answers computed from the previous database are stale
+        self.response_cache.invalidate()
+
+        print(f"Shared resources built (data version {content_version or version}).")
+        return {"orchestrator": orchestrator,
+                "chain": self._chain,
+                "response_cache": self.response_cache,
+                "metrics": self.metrics,
+                "data_version": content_version or version}
+
+    def get(self) -> Dict[str, Any]:
+        """
+        Returns the shared resources, (re)building them if this is the first
+        call or if any of the data files changed on disk.
+        """
+        version = data_version(self.paths)
+        resources = self._resources
+        if resources is not None and version == self._version:
+            return resources
+
+        with self._lock:
+            # Another thread may have rebuilt while we were waiting
+            if self._resources is None or version != self._version:
+                self._resources = self._build(version)
+                self._version = version
+            return self._resources
+
+    def invalidate(self):
+        """
+        Explicit invalidation hook: drops the data-dependent resources so the
+        next `get()` decrypts the data files and rebuilds the orchestrator.
+        """
+        with self._lock:
+            self._resources = None
+            self._version = None
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+def get_shared_resources(encode_key:str, api_key:str, anchors_path:Optional[str]=None,
+                         data_path:Optional[str]=None, contacts_path:Optional[str]=None,
+                         llm_backend:str="groq") -> SharedResources:
+    """
+    Returns the process-level SharedResources for this configuration.
+    """
+    paths = dict(DEFAULT_PATHS)
+    for name, value in (("anchors_path", anchors_path), ("data_path", data_path), ("contacts_path", contacts_path)):
+        if value is not None:
+            paths[name] = value
+
+    key = (encode_key, api_key, paths["anchors_path"], paths["data_path"], paths["contacts_path"], llm_backend)
+    with _registry_lock:
+        if key not in _registry:
+            _registry[key] = SharedResources(encode_key, api_key, **paths, llm_backend=llm_backend)
+        return _registry[key]
+
+def invalidate_shared_resources():
+    """
+    Invalidates every process-level resource set (e.g. after the data files were rebuilt).
+    """
+    with _registry_lock:
+        for resources in _registry.values():
+            resources.invalidate()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 03:12:26 2026
+
+@author: tienn
+"""
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Hashable
+
+def as_vector(embedding) -> np.ndarray:
+    """
+    Flattens a query embedding (torch tensor or numpy array) into a float32 numpy vector.
+    """
+    if hasattr(embedding, "detach"):
+        embedding = embedding.detach().cpu().numpy()
+    return np.asarray(embedding, dtype=np.float32).reshape(-1)
+
+class SemanticResponseCache:
+    """
+    Cache of LLM answers keyed by the query embedding the router already computed.
+    A lookup hits when a stored query with the SAME context key (a digest of
+    the system prompt and of the skills the query mentions) has a cosine
+    similarity >= threshold and is younger than `ttl` seconds. Near-identical
+    questions whose facts differ ("years of C++?" / "years of C#?") never share
+    an answer.
+
+    Embeddings live in one matrix preallocated at the first store (one row
+    per slot); a lookup only scores the slots of its context key, and expired
+    entries are dropped when they are met. The least recently used entry is
+    evicted past `max_entries`.
+    """
+    def __init__(self, threshold:float=0.95, ttl:float=3600.0, max_entries:int=256):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._reset()
+
+    def _reset(self):
+        self._matrix = None                            # (max_entries, dim), allocated on first store
+        self._created = np.zeros(self.max_entries)
+        self._used = np.zeros(self.max_entries)        # LRU clock of every slot
+        self._keys = [None] * self.max_entries
+        self._responses = [None] * self.max_entries
+        self._slots = {}                               # context key -> its occupied slots
+        self._free = list(range(self.max_entries - 1, -1, -1))
+        self._clock = 0
+
+    def _release(self, slot:int):
+        slots = self._slots[self._keys[slot]]
+        slots.remove(slot)
+        if not slots:
+            del self._slots[self._keys[slot]]
+        self._keys[slot] = None
+        self._responses[slot] = None
+        self._free.append(slot)
+
+    def lookup(self, query_embedding, context_key:str) -> Optional[str]:
+        """
+        Returns the cached answer of the most similar previous query with the same context, or None.
+        """
+        query = as_vector(query_embedding)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        with self._lock:
+            slots = self._slots.get(context_key)
+            if slots:
+                # Lazy expiry, only for the entries this lookup would consider
+                now = time.time()
+                for slot in [s for s in slots if now - self._created[s] > self.ttl]:
+                    self._release(slot)
+                slots = self._slots.get(context_key)
+            if slots and self._matrix is not None and self._matrix.shape[1] == len(query):
+                scores = self._matrix[slots] @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    slot = slots[best]
+                    self._clock += 1
+                    self._used[slot] = self._clock
+                    self.hits += 1
+                    return self._responses[slot]
+
+            self.misses += 1
+            return None
+
+    def store(self, query_embedding, context_key:str, response:str):
+        query = as_vector(query_embedding)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != len(query):
+                self._reset()
+                self._matrix = np.zeros((self.max_entries, len(query)), dtype=np.float32)
+            if not self._free:
+                # Full: evict the least recently used slot
+                occupied = np.array([k is not None for k in self._keys])
+                self._release(int(np.argmin(np.where(occupied, self._used, np.inf))))
+            slot = self._free.pop()
+            self._matrix[slot] = query
+            self._created[slot] = time.time()
+            self._clock += 1
+            self._used[slot] = self._clock
+            self._keys[slot] = context_key
+            self._responses[slot] = response
+            self._slots.setdefault(context_key, []).append(slot)
+
+    def invalidate(self):
+        """
+        Drops every cached answer (called when the CV database changes).
+        """
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "size": self.max_entries - len(self._free),
+                    "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+def context_key(system_prompt:str, skills:Iterable[str]=()) -> str:
+    """
+    Response cache key of a request: equal only when the intent, facts,
+    snippets and (normalized) skills asked about are.
+    """
+    skills = "\n".join(sorted({s.strip().lower() for s in skills}))
+    return hashlib.sha256(f"{system_prompt}\0{skills}".encode("utf-8")).hexdigest()[:24]
+
+def normalize_query(user_query:str) -> str:
+    """
+    Exact-match cache key: case and whitespace differences do not change the pipeline output.
+    """
+    return " ".join(user_query.lower().split())
+
+class QueryResultCache:
+    """
+    Bounded, thread-safe LRU memo for CVOrchestrator.handle_query results.
+    Every entry is tagged with the database version it was computed from;
+    an entry from another version is treated as a miss and dropped.
+    """
+    def __init__(self, max_entries:int=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key:Hashable, version:Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key:Hashable, version:Hashable, value:Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "size": len(self._entries)}
@@ -9,63 +9,138 @@ Created on Fri Dec 12 20:07:49 2025
 import json
 import numpy as np
 import argparse
-from chatbot.utils import load_data, match_skills
-from sentence_transformers import SentenceTransformer, util
+import logging
+from collections import defaultdict
+from chatbot.utils import load_data, SkillMatcher
+from chatbot.queryContext import QueryContext
+from chatbot.encoders import load_embedding_model
+from chatbot.vectorIndex import EmbeddingMatrix
+from chatbot.lexicalIndex import LexicalIndex, fuse_scores
+
+logger = logging.getLogger(__name__)
 
 class CVRetrievalEngine:
     def __init__(self,
                  model,
-                 corpus):
+                 corpus,
+                 embedding_store=None,
+                 precision="float32",
+                 lexical=False,
+                 shortlist_size=256,
+                 lexical_weight=0.3):
         self.model = model
         
-        # Load the Atomic Data
+        # Load the Atomic Data (a list, or a lazily decrypted container: results are read back by row)
         self.corpus = corpus
-            
+
+        # One pass over the chunks (decrypted once when the corpus is a container):
+        # texts to embed, and the "Skill Index" for fast filtering.
+        # Posting lists: skill -> sorted chunk indices, type -> sorted chunk indices
+        # so that candidate selection is a set union instead of a corpus scan
+        corpus_texts, lexical_texts = [], []
+        self.skill_postings = defaultdict(list)
+        self.type_postings = defaultdict(list)
+        for idx, doc in enumerate(self.corpus):
+            corpus_texts.append(doc['text'])
+            if lexical:
+                lexical_texts.append(f"{doc['text']} {doc['context_str']}")
+            for skill in set(s.lower() for s in doc['skills']):
+                self.skill_postings[skill].append(idx)
+            self.type_postings[doc.get('type')].append(idx)
+
         # 1. Pre-compute Embeddings for all atomic chunks
         # We embed the 'text' field (description + details)
-        corpus_texts = [doc['text'] for doc in self.corpus]
-        self.corpus_embeddings = self.model.encode(corpus_texts, convert_to_tensor=True)
+        # Only new or edited chunks are encoded when an embedding store is given
+        if embedding_store is not None:
+            corpus_vectors = embedding_store.encode(corpus_texts)
+        else:
+            corpus_vectors = self.model.encode(corpus_texts, convert_to_numpy=True)
+        # Pre-normalized, optionally compact (float16 / int8), scored with NumPy
+        self.corpus_embeddings = EmbeddingMatrix(corpus_vectors, precision)
         
-        # 2. Build a "Skill Index" for fast filtering
         # Set of all unique skills in your CV for quick lookup
-        self.all_known_skills = set()
-        for doc in self.corpus:
-            for skill in doc['skills']:
-                self.all_known_skills.add(skill.lower())
+        self.all_known_skills = set(self.skill_postings)
+
+        # Compiled once, shared with the orchestrator's fact injection
+        self.skill_matcher = SkillMatcher(self.all_known_skills)
+
+        # 3. Optional BM25 first stage (large corpora): candidate sets larger than
+        # shortlist_size are narrowed lexically before the dense scoring
+        self.lexical_index = None
+        self.shortlist_size = shortlist_size
+        self.lexical_weight = lexical_weight
+        if lexical:
+            self.lexical_index = LexicalIndex(lexical_texts)
                 
         print(f"Engine ready. Loaded {len(self.corpus)} facts and {len(self.all_known_skills)} unique skills.")
 
-    def intent_matching(self, user_query, user_intent):
-        print(f"🔍 [Search] Intent: {user_intent.capitalize()}")
+    def detect_skills(self, user_query, query_context=None):
+        """
+        Skills mentioned in the query, computed once per request and cached on the context.
+        """
+        query_context = QueryContext.ensure(query_context, user_query, self.model)
+        if query_context.detected_skills is None:
+            query_context.detected_skills = self.skill_matcher.match(query_context.lower_text)
+        return query_context.detected_skills
+
+    def skill_candidates(self, skills, match_all=False):
+        """
+        Sorted indices of the chunks tagged with any (or, with match_all, every) of the skills.
+        """
+        postings = [self.skill_postings.get(s.lower(), []) for s in skills]
+        if not postings:
+            return []
+        if match_all:
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = set().union(*postings)
+        return sorted(candidates)
+
+    def result_vectors(self, results):
+        """
+        Unit-norm embeddings of search results (same order), found by their corpus row.
+        None when a result does not come from this engine's search().
+        """
+        rows = [r.get('row') for r in results]
+        if not rows or None in rows:
+            return None
+        return self.corpus_embeddings.vectors(rows)
+
+    def intent_matching(self, user_query, user_intent, query_context=None):
+        logger.debug("[Search] Intent: %s", user_intent)
         candidate_indices = []
         if user_intent == "skills":
-            detected_skills = match_skills(self.all_known_skills, user_query.lower())
+            detected_skills = self.detect_skills(user_query, query_context)
             if detected_skills:
-                print(f"   [Filter] Detected specific skills: {detected_skills}")
+                logger.debug("[Filter] Detected specific skills: %s", detected_skills)
                 # Only keep documents that contain AT LEAST ONE of the detected skills
-                for idx, doc in enumerate(self.corpus):
-                    # Check intersection between doc skills and detected skills
-                    if any(s in doc['skills'] for s in detected_skills):
-                        candidate_indices.append(idx)
+                # (union of the posting lists of the detected skills)
+                candidate_indices = self.skill_candidates(detected_skills)
             else:
-                print("   [Filter] No specific skills detected in query. Using full corpus.")
+                logger.debug("[Filter] No specific skills detected in query. Using full corpus.")
                 candidate_indices = list(range(len(self.corpus)))
         elif user_intent in ["experience", "education", "projects"]:
-            candidate_indices = [idx for idx, doc in enumerate(self.corpus) if doc['type'] == user_intent]
+            candidate_indices = list(self.type_postings.get(user_intent, []))
         elif user_intent in ["contact"]:
             candidate_indices = []
         else:
             candidate_indices = list(range(len(self.corpus)))
         return candidate_indices
 
-    def search(self, user_query, user_intent, top_k=3):
+    def search(self, user_query, user_intent, top_k=3, query_context=None):
         """
         Hybrid Search:
         1. Identify skills in query -> Filter corpus (Indices).
-        2. Semantic Search on filtered indices -> Rank results.
+        1b. (lexical index) Large candidate sets -> BM25 shortlist.
+        2. Semantic Search on filtered indices -> Rank results
+           (fused with the BM25 scores when the shortlist was used).
         """
+        query_context = QueryContext.ensure(query_context, user_query, self.model)
+
         # --- Step 1: Intent Matching & Filtering ---
-        candidate_indices = self.intent_matching(user_query=user_query, user_intent=user_intent)
+        with query_context.timer("filtering"):
+            candidate_indices = self.intent_matching(user_query=user_query, user_intent=user_intent,
+                                                     query_context=query_context)
 
         if not candidate_indices:
             return []
@@ -73,25 +148,43 @@ class CVRetrievalEngine:
         # --- Step 2: Semantic Search on Candidates ---
         # We only compare the query against the embeddings of the CANDIDATES
         
-        # Encode the query
-        query_embedding = self.model.encode(user_query, convert_to_tensor=True)
-        
-        # Filter the pre-computed embeddings
-        target_embeddings = self.corpus_embeddings[candidate_indices]
+        # Encode the query (re-uses the router's encoding when the context is shared)
+        with query_context.timer("retrieval_encode"):
+            query_embedding = query_context.embedding
         
-        # Calculate cosine similarity
-        hits = util.semantic_search(query_embedding, target_embeddings, top_k=top_k)[0]
+        # (the whole corpus needs no row filter at all)
+        rows = None if len(candidate_indices) == len(self.corpus) else candidate_indices
+        shortlist = None
+        if self.lexical_index is not None and len(candidate_indices) > self.shortlist_size:
+            with query_context.timer("lexical"):
+                shortlist, lexical_scores = self.lexical_index.shortlist(query_context.text, self.shortlist_size, rows)
+            # Too few term matches (e.g. "tell me about yourself"): dense scoring over every candidate
+            if len(shortlist) < top_k:
+                shortlist = None
+
+        with query_context.timer("top_k"):
+            if shortlist is not None:
+                # Dense scores of the bounded shortlist only, fused with the lexical ones
+                fused = fuse_scores(self.corpus_embeddings.scores(query_embedding, rows=shortlist),
+                                    lexical_scores, self.lexical_weight)
+                order = np.argpartition(-fused, top_k - 1)[:top_k]
+                order = order[np.argsort(-fused[order], kind="stable")]
+                best, scores = shortlist[order], fused[order]
+            else:
+                # Cosine similarity against the pre-computed embeddings, restricted to
+                # the candidates, with a partial top-k selection (no full sort)
+                best, scores = self.corpus_embeddings.topk(query_embedding, top_k, rows=rows)
         
         # --- Step 3: Format Results ---
         results = []
-        for hit in hits:
-            # The 'corpus_id' in 'hit' corresponds to the index in 'target_embeddings'
-            # We need to map it back to the original 'self.corpus' index
-            original_index = candidate_indices[hit['corpus_id']]
-            score = hit['score']
+        for original_index, score in zip(best, scores):
+            # Indices already point into 'self.corpus'
+            score = float(score)
             doc = self.corpus[original_index]
             
             results.append({
+                "id": doc.get('id'),
+                "row": int(original_index), # Position in the corpus (ids are optional and may repeat)
                 "score": score,
                 "context": doc['context_str'],
                 "content": doc['text'],
@@ -102,7 +195,7 @@ class CVRetrievalEngine:
 
 # --- Usage Example ---
 def main(db_path : str):
-    engine = CVRetrievalEngine(SentenceTransformer('all-MiniLM-L6-v2'), db=load_data('cv_atomic_db.json'))
+    engine = CVRetrievalEngine(load_embedding_model(), db=load_data('cv_atomic_db.json'))
     
     # Test 1: Specific Skill Query
     query1 = "How are you familiar with Python?"
@@ -9,14 +9,19 @@ Created on Fri Dec 12 13:11:06 2025
 import json
 from datetime import datetime
 from collections import defaultdict
+from functools import lru_cache
 import re
 from typing import List, Dict, Any, Tuple
 
 DATE_FMT_VARIANTS = ["%Y-%m-%d", "%Y-%m", "%Y/%m", "%Y"]
+PRESENT_WORDS = ("present", "current", "now")
+
+def is_present(s: str) -> bool:
+    return (s or "").strip().lower() in PRESENT_WORDS
 
 def parse_date(s: str) -> datetime:
     s = s.strip()
-    if s.lower() in ["present", "current", "now"]:
+    if s.lower() in PRESENT_WORDS:
         return datetime.today()
     elif not s or s.lower() in ["unknown", "n/a", "na"]:
         return datetime(1900, 1, 1)  # represent unknown with a very old date
@@ -73,12 +78,16 @@ def format_atomic_data(data: Dict[str, Any]) -> List[Dict[str, Any]]:
     return rows
 
 def compute_skill_experience(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    # The interval engine needs NumPy: imported here so this module stays cheap to import
+    from chatbot.intervals import MonthIntervals
+
     skill_data = defaultdict(lambda: {"months": 0, "examples": []})
+    # Union of the periods per skill: overlapping roles are not double-counted
+    skill_months = MonthIntervals(rows).skill_months()
     for r in rows:
-        duration = months_between(r["start_date"], r["end_date"])
         for sk in r["skills"]:
             key = normalize_skill(sk)
-            skill_data[key]["months"] += duration
+            skill_data[key]["months"] = skill_months[key]
             skill_data[key]["examples"].append({
                 "name": r["name"],
                 "role": r["role"],
@@ -90,17 +99,12 @@ def compute_skill_experience(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str,
     return skill_data
 
 def total_experience_years(rows: List[Dict[str, Any]]) -> float:
-    # Merge overlapping periods across all roles
-    intervals = [(r["start_date"], r["end_date"]) for r in rows]
-    intervals.sort(key=lambda x: x[0])
-    merged = []
-    for start, end in intervals:
-        if not merged or start > merged[-1][1]:
-            merged.append([start, end])
-        else:
-            merged[-1][1] = max(merged[-1][1], end)
-    months = sum(months_between(s, e) for s, e in merged)
-    return round(months / 12.0, 2)
+    return round(merged_months(rows) / 12.0, 2)
+
+def merged_months(rows: List[Dict[str, Any]]) -> int:
+    # Merge overlapping periods across all roles (month-granular union)
+    from chatbot.intervals import MonthIntervals
+    return MonthIntervals(rows).months()
 
 def highest_education(profile: Dict[str, Any]) -> Dict[str, str]:
     # Define order of levels
@@ -202,35 +206,107 @@ def parse_user_input(s: str) -> Tuple[str, List[str]]:
         return prefix, parts
     return s.lower(), []
 
-def match_skills(skills_list, text):
+_is_word_char = re.compile(r"\w").match
+
+class SkillMatcher:
     """
-    Matches a list of skills in a text, handling special characters
-    (C++, C#, .NET) and punctuation.
+    Matches a fixed skill vocabulary in free text.
+    Built once (Aho-Corasick automaton over the lowercased skills), then each
+    call is a single pass over the text, whatever the size of the vocabulary.
+    Same semantics as the regex version: case-insensitive, a skill must not be
+    glued to other word characters (so "c" does not match inside "react"),
+    and the longest skill wins at a given position ("C++" over "C").
     """
-    if not text or not skills_list:
-        return []
+    def __init__(self, skills_list):
+        # lowercase key -> skill as given (canonical output form)
+        self.canonical = {}
+        for skill in skills_list:
+            key = skill.lower()
+            if key and key not in self.canonical:
+                self.canonical[key] = skill
+
+        # 1. Trie: goto transitions, and the lengths of the skills ending at each node
+        self._goto = [{}]
+        self._out = [[]]
+        for key in self.canonical:
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(len(key))
 
-    # 1. Sort skills by length (descending)
-    # This ensures we match "C++" instead of just "C" inside "C++"
-    skills_list = sorted(skills_list, key=len, reverse=True)
+        # 2. Failure links (BFS), merging the outputs of the suffix nodes
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
 
-    # 2. Escape special regex characters in skills (e.g., +, ., #)
-    # "C++" becomes "C\+\+"
-    escaped_skills = [re.escape(skill) for skill in skills_list]
+    def __len__(self):
+        return len(self.canonical)
 
-    # 3. Create the Regex Pattern
-    # (?<!\w) : Negative Lookbehind - ensures start is not a word char
-    # |       : OR operator to join all skills
-    # (?!\w)  : Negative Lookahead - ensures end is not a word char
-    pattern = r"(?<!\w)(" + "|".join(escaped_skills) + r")(?!\w)"
+    def match(self, text):
+        """
+        Returns the skills found in the text (canonical form, unique, in order of appearance).
+        """
+        if not text or not self.canonical:
+            return []
 
-    # 4. Find matches
-    # flags=re.IGNORECASE allows matching "python" with "Python"
-    matches = re.findall(pattern, text, flags=re.IGNORECASE)
+        text = text.lower()
+        n = len(text)
+        goto, fail, out = self._goto, self._fail, self._out
 
-    # 5. Return unique matches (canonicalizing case)
-    # This maps the found text (e.g., 'c++') back to your list format ('C++')
-    skill_map = {s.lower(): s for s in skills_list}
-    unique_matches = set(skill_map[m.lower()] for m in matches if m.lower() in skill_map)
+        # Longest skill with valid boundaries for every start position
+        best = {}
+        node = 0
+        for end, ch in enumerate(text, start=1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            if end < n and _is_word_char(text[end]):
+                continue
+            for length in out[node]:
+                start = end - length
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if length > best.get(start, 0):
+                    best[start] = length
+
+        # Leftmost-longest, non-overlapping (what re.findall does with the sorted alternation)
+        found = []
+        cursor = 0
+        for start in sorted(best):
+            if start < cursor:
+                continue
+            cursor = start + best[start]
+            skill = self.canonical[text[start:cursor]]
+            if skill not in found:
+                found.append(skill)
+        return found
+
+@lru_cache(maxsize=32)
+def _get_skill_matcher(skills):
+    return SkillMatcher(skills)
+
+def match_skills(skills_list, text):
+    """
+    Matches a list of skills in a text, handling special characters
+    (C++, C#, .NET) and punctuation.
+    Prefer building a SkillMatcher once; this wrapper caches one per vocabulary.
+    """
+    if not text or not skills_list:
+        return []
 
-    return list(unique_matches)
+    return _get_skill_matcher(frozenset(skills_list)).match(text)
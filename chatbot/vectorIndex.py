@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 07:35:14 2026
+
+@author: tienn
+"""
+import numpy as np
+from typing import Dict, Any, Sequence, Optional, Tuple
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Rows up-cast per block when scoring compact matrices (bounds the temporary float32 copy)
+SCORE_BLOCK_ROWS = 4096
+
+# Shortlists below this fraction of the matrix are gathered and scored alone,
+# larger ones are scored against the full matrix and masked (measured crossover ~0.2)
+GATHER_MAX_FRACTION = 0.15
+
+def to_numpy(embeddings) -> np.ndarray:
+    """
+    Torch tensor / list / numpy array -> float32 numpy array (no copy when already float32).
+    """
+    if hasattr(embeddings, "detach"):
+        embeddings = embeddings.detach().cpu().numpy()
+    return np.asarray(embeddings, dtype=np.float32)
+
+def normalize_rows(vectors:np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class EmbeddingMatrix:
+    """
+    Pre-normalized embedding matrix scored with a plain NumPy dot product
+    (cosine similarity, no torch needed).
+
+    precision:
+        float32 : reference; rows that are already unit-norm float32 (e.g. the
+                  memory-mapped store) are used as-is, without a copy
+        float16 : half the memory
+        int8    : a quarter of the memory, symmetric per-row scale (row = q * scale)
+    """
+    def __init__(self, embeddings, precision:str="float32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+        self.precision = precision
+
+        vectors = to_numpy(embeddings)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        self.dim = vectors.shape[1] if vectors.size else 0
+
+        if len(vectors) and not np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-3):
+            vectors = normalize_rows(vectors)
+
+        self.scales = None
+        if precision == "float32":
+            self.data = vectors
+        elif precision == "float16":
+            self.data = vectors.astype(np.float16)
+        else:
+            scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0, dtype=np.float32)
+            scales[scales == 0] = 1.0
+            self.data = np.round(vectors / scales[:, None]).astype(np.int8)
+            self.scales = scales.astype(np.float32)
+
+    def __len__(self):
+        return len(self.data)
+
+    def slice(self, start:int, stop:int) -> "EmbeddingMatrix":
+        """
+        Rows [start, stop) as a matrix sharing this one's storage (no copy, no re-quantization).
+        """
+        part = object.__new__(EmbeddingMatrix)
+        part.precision = self.precision
+        part.dim = self.dim
+        part.data = self.data[start:stop]
+        part.scales = self.scales[start:stop] if self.scales is not None else None
+        return part
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def _score_rows(self, rows:np.ndarray, queries:np.ndarray, scales:Optional[np.ndarray]) -> np.ndarray:
+        if rows.dtype == np.float32:
+            scores = rows @ queries
+        else:
+            # Up-cast block by block: BLAS only works on float32 and the copy stays bounded
+            scores = np.empty((len(rows),) + queries.shape[1:], dtype=np.float32)
+            for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+                block = rows[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+                scores[start:start + SCORE_BLOCK_ROWS] = block @ queries
+        if scales is not None:
+            scores *= scales.reshape((-1,) + (1,) * (scores.ndim - 1))
+        return scores
+
+    def vectors(self, rows:Sequence[int]) -> np.ndarray:
+        """
+        Unit-norm float32 copies of a few rows (de-quantized for float16 / int8).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = self.data[rows].astype(np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[rows][:, None]
+        return normalize_rows(vectors)
+
+    def scores(self, query, rows:Optional[Sequence[int]]=None) -> np.ndarray:
+        """
+        Cosine similarity of one query against every row (or only `rows`), shape (n,).
+        """
+        query = normalize_rows(to_numpy(query).reshape(-1))
+        if rows is None:
+            return self._score_rows(self.data, query, self.scales)
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = np.empty(len(rows), dtype=np.float32)
+        # Gather block by block so the temporary copy stays bounded
+        for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+            block = rows[start:start + SCORE_BLOCK_ROWS]
+            scales = self.scales[block] if self.scales is not None else None
+            scores[start:start + SCORE_BLOCK_ROWS] = self._score_rows(self.data[block], query, scales)
+        return scores
+
+    def topk(self, query, k:int, rows:Optional[Sequence[int]]=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k rows (indices into the matrix, scores) among `rows` (default all), best first.
+        Small shortlists are scored alone; otherwise the full matrix is scored
+        once and the non-candidates are masked to -inf in place. Either way the
+        k best are picked with argpartition and only those k are sorted.
+        """
+        positions = None
+        if rows is None:
+            scores = self.scores(query)
+            n_valid = len(scores)
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            n_valid = len(rows)
+            if n_valid < GATHER_MAX_FRACTION * len(self.data):
+                scores = self.scores(query, rows=rows)
+                positions = rows
+            else:
+                scores = self.scores(query)
+                if n_valid < len(scores):
+                    excluded = np.ones(len(scores), dtype=bool)
+                    excluded[rows] = False
+                    scores[excluded] = -np.inf
+
+        k = min(k, n_valid)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if k < len(scores):
+            best = np.argpartition(scores, -k)[-k:]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        top_scores = scores[best]
+        if positions is not None:
+            best = positions[best]
+        return best, top_scores
+
+    def score_batch(self, queries) -> np.ndarray:
+        """
+        Cosine similarity of many queries against every row, shape (n_queries, n).
+        """
+        queries = normalize_rows(to_numpy(queries).reshape(-1, self.dim))
+        return self._score_rows(self.data, queries.T, self.scales).T
+
+def topk_overlap(reference:np.ndarray, candidate:np.ndarray, k:int) -> float:
+    """
+    Mean fraction of the reference top-k rows also found in the candidate top-k (per query).
+    """
+    k = min(k, reference.shape[1])
+    ref_top = np.argsort(-reference, axis=1)[:, :k]
+    cand_top = np.argsort(-candidate, axis=1)[:, :k]
+    return float(np.mean([len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top)]))
+
+def compare_precisions(embeddings, queries, k:int=5) -> Dict[str, Dict[str, Any]]:
+    """
+    Memory and recall@k of every compact precision against the float32 baseline.
+    """
+    baseline = EmbeddingMatrix(embeddings, "float32")
+    reference = baseline.score_batch(queries)
+    report = {}
+    for precision in PRECISIONS:
+        index = baseline if precision == "float32" else EmbeddingMatrix(embeddings, precision)
+        scores = index.score_batch(queries)
+        report[precision] = {"bytes": index.nbytes,
+                             "recall_at_k": round(topk_overlap(reference, scores, k), 4),
+                             "max_abs_score_error": round(float(np.max(np.abs(scores - reference))), 6)}
+    return report
@@ -5,31 +5,38 @@ Created on Sat Dec 13 13:30:40 2025
 
 @author: tienn
 """
+import logging
 import streamlit as st
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from chatbot.orchestrator import CVOrchestrator
-from tools.pickle_data import SecureDataTool
-from typing import Dict, Any
+from chatbot.resources import get_shared_resources
+from chatbot.llm import build_llm_inputs
+from chatbot.metrics import timed_stream
 
 anchors_path = "data/anchors.pkl"
 data_path = "data/cv_atomic_db.pkl"
 contacts_path = "data/contacts.pkl"
 
-def load_data(anchors_path:str, data_path:str, contacts_path:str) -> Dict[str,Any]:
-    if "encode_key" in st.secrets:
-        data_tool = SecureDataTool(st.secrets["encode_key"])
-    else:
-        raise FileNotFoundError("Could not load encryption key!")
-    
-    anchors = data_tool.load_encrypted_pickle(anchors_path)
-    data = data_tool.load_encrypted_pickle(data_path)
-    contacts = data_tool.load_encrypted_pickle(contacts_path)
-    
-    return {"anchors" : anchors,
-            "database" : data,
-            "contacts" : contacts}
+logger = logging.getLogger(__name__)
+
+# Render tokens as they arrive (set to False to wait for the full completion)
+STREAM_RESPONSES = True
+
+def generate_response(chain, llm_inputs, metrics) -> str:
+    """
+    Renders the LLM answer token by token as it arrives and returns the full text.
+    Falls back to the blocking call when streaming is disabled or fails.
+    """
+    placeholder = st.empty()
+    if STREAM_RESPONSES:
+        try:
+            return placeholder.write_stream(timed_stream(metrics, chain.stream(llm_inputs)))
+        except Exception:
+            logger.exception("Streaming failed, falling back to a blocking call.")
+
+    with metrics.timer("llm_total"):
+        response = chain.invoke(llm_inputs)
+    # Overwrites any partial output left by a failed stream
+    placeholder.write(response)
+    return response
 
 def main():
     if "api_key" in st.secrets:
@@ -37,22 +44,19 @@ def main():
     else:
         raise FileNotFoundError("Could not load API key!")
 
-    llm = ChatGroq(
-        model="openai/gpt-oss-120b",
-        # temperature=0,
-        api_key=API_KEY
-    )
-    
-    inputs = load_data(anchors_path, data_path, contacts_path)
+    if "encode_key" in st.secrets:
+        ENCODE_KEY = st.secrets["encode_key"]
+    else:
+        raise FileNotFoundError("Could not load encryption key!")
 
-    cv_filter = CVOrchestrator(**inputs)
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "{system_promt}"),
-        ("user", "{question}")
-    ])
-    
-    chain = prompt | llm | StrOutputParser()
+    # Built once per process and shared by all sessions; rebuilt when the data files change
+    shared = get_shared_resources(ENCODE_KEY, API_KEY, anchors_path, data_path, contacts_path)
+    resources = shared.get()
+
+    cv_filter = resources["orchestrator"]
+    chain = resources["chain"]
+    response_cache = resources["response_cache"]
+    metrics = resources["metrics"]
 
     # STREAMLIT UI
     st.title("Profile Assistant")
@@ -73,16 +77,21 @@ def main():
         
         results = cv_filter.handle_query(user_input)
         if results['status'] == "success":
-            response = chain.invoke({
-                "system_promt" : results['system_prompt'],
-                "question" : results['user_query']
-            })
+            # Near-identical questions grounded on the same facts and snippets skip the LLM entirely
+            response = response_cache.lookup(results['query_embedding'], results['cache_key'])
+            if response is not None:
+                metrics.incr("response_cache_hits")
+                st.chat_message("assistant").write(response)
+            else:
+                with st.chat_message("assistant"):
+                    response = generate_response(chain, build_llm_inputs(results), metrics)
+                response_cache.store(results['query_embedding'], results['cache_key'], response)
         else:
             response = results['response']
+            st.chat_message("assistant").write(response)
     
         # Add AI response to history
         st.session_state.messages.append({"role": "assistant", "content": response})
-        st.chat_message("assistant").write(response)
         
 if __name__ == "__main__":
     main()
\ No newline at end of file
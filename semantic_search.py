@@ -6,35 +6,50 @@ Created on Fri Dec 12 12:44:26 2025
 @author: tienn
 """
 
-from sentence_transformers import SentenceTransformer, util
 import json
+from chatbot.encoders import load_embedding_model
 
-# Load embedding model
-model = SentenceTransformer('all-MiniLM-L6-v2')
-
-# Load work history
-with open("work_history.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-# Flatten experience into searchable text
+# Built on first search, not at import time
+model = None
 texts = []
 meta = []
-for block in data["experience"]:
-    company = block["company"]
-    for item in block["items"]:
-        combined = item["details"] + " " + " ".join(item["skills"])
-        texts.append(combined)
-        meta.append({
-            "title": item["title"],
-            "company": company,
-            "details": item["details"],
-            "skills": item["skills"]
-        })
+embeddings = None
 
-# Embed all entries
-embeddings = model.encode(texts, convert_to_tensor=True)
+def load_work_history(path: str = "work_history.json"):
+    # Load work history
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    # Flatten experience into searchable text
+    texts = []
+    meta = []
+    for block in data["experience"]:
+        company = block["company"]
+        for item in block["items"]:
+            combined = item["details"] + " " + " ".join(item["skills"])
+            texts.append(combined)
+            meta.append({
+                "title": item["title"],
+                "company": company,
+                "details": item["details"],
+                "skills": item["skills"]
+            })
+    return texts, meta
+
+def build_index(path: str = "work_history.json"):
+    global model, texts, meta, embeddings
+    # Load embedding model
+    if model is None:
+        model = load_embedding_model('all-MiniLM-L6-v2')
+    texts, meta = load_work_history(path)
+    # Embed all entries
+    embeddings = model.encode(texts, convert_to_tensor=True)
 
 def search_skills(query: str, top_k: int = 5):
+    from sentence_transformers import util
+
+    if embeddings is None:
+        build_index()
     query_emb = model.encode(query, convert_to_tensor=True)
     hits = util.semantic_search(query_emb, embeddings, top_k=top_k)[0]
     results = []
@@ -49,4 +64,4 @@ def search_skills(query: str, top_k: int = 5):
             "details": entry["details"],
             "skills": entry["skills"]
         })
-    return results
\ No newline at end of file
+    return results
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 04:52:18 2026
+
+@author: tienn
+"""
+import os
+import json
+import signal
+import logging
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from chatbot.resources import get_shared_resources, DEFAULT_PATHS
+from chatbot.profiles import ProfileRegistry
+from chatbot.queryContext import QueryContext
+from chatbot.llm import build_llm_inputs
+from chatbot.metrics import timed_stream
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+def load_secrets(secrets_path:str=".streamlit/secrets.toml") -> Dict[str, str]:
+    """
+    Same secrets as the Streamlit app; environment variables take precedence.
+    """
+    secrets = {}
+    if os.path.exists(secrets_path):
+        import toml
+        secrets.update(toml.load(secrets_path))
+    if "CV_ENCODE_KEY" in os.environ:
+        secrets["encode_key"] = os.environ["CV_ENCODE_KEY"]
+    if "GROQ_API_KEY" in os.environ:
+        secrets["api_key"] = os.environ["GROQ_API_KEY"]
+    return secrets
+
+class CVRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API around one shared CVOrchestrator:
+        GET  /health
+        GET  /metrics   (JSON, or Prometheus text with ?format=prometheus)
+        POST /route     {"query"} | {"queries": [...]}  -> routing decision(s)
+        POST /retrieve  {"query", "intent"?, "top_k"?}  -> ranked CV snippets
+        POST /answer    {"query", "stream"?}            -> LLM answer (chunked text when streaming)
+    With --profiles_dir every POST body may also name a "profile" (candidate).
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, payload:Dict[str, Any], status:int=200):
+        body = json.dumps(payload, default=float).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, text:str):
+        data = text.encode("utf-8")
+        if data:
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    def _stream_text(self, chunks):
+        self._streaming = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            self._send_chunk(chunk)
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object.")
+        # /route also takes a batch: a non-empty list of queries instead of one query
+        if self.path == "/route" and "queries" in payload:
+            queries = payload["queries"]
+            if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+                raise ValueError("'queries' must be a non-empty list of non-empty strings.")
+            return payload
+        query = payload.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError("Request body must be a JSON object with a non-empty string 'query'.")
+        top_k = payload.get("top_k", 5)
+        if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k <= 0:
+            raise ValueError("'top_k' must be a positive integer.")
+        intent = payload.get("intent")
+        if intent is not None and not isinstance(intent, str):
+            raise ValueError("'intent' must be a string.")
+        return payload
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json({"status": "ok", "pid": os.getpid()})
+        elif self.path.startswith("/metrics"):
+            metrics = self.server.resources.metrics
+            if "format=prometheus" in self.path:
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                snapshot = metrics.snapshot()
+                if isinstance(self.server.resources, ProfileRegistry):
+                    snapshot["profiles"] = self.server.resources.stats()
+                else:
+                    snapshot["response_cache"] = self.server.resources.response_cache.stats()
+                snapshot["pid"] = os.getpid()
+                self._send_json(snapshot)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        handlers = {"/route": self.handle_route,
+                    "/retrieve": self.handle_retrieve,
+                    "/answer": self.handle_answer}
+        handler = handlers.get(self.path)
+        if handler is None:
+            self._send_json({"error": "not found"}, status=404)
+            return
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            self._send_json({"error": str(e)}, status=400)
+            return
+        self._streaming = False
+        try:
+            if isinstance(self.server.resources, ProfileRegistry):
+                try:
+                    resources = self.server.resources.get(payload.get("profile"))
+                except (ValueError, FileNotFoundError):
+                    self._send_json({"error": "unknown profile"}, status=404)
+                    return
+            else:
+                resources = self.server.resources.get()
+            handler(payload, resources)
+        except Exception:
+            logger.exception("Request to %s failed", self.path)
+            if self._streaming:
+                # Headers are already out: the truncated chunked body tells the client it failed
+                self.close_connection = True
+            else:
+                self._send_json({"error": "internal error"}, status=500)
+
+    def handle_route(self, payload, resources):
+        orchestrator = resources["orchestrator"]
+        if "queries" in payload:
+            # Batch: one encode call and one scoring pass for all the queries
+            self._send_json({"results": orchestrator.router.route_queries(payload["queries"])})
+            return
+        query = payload["query"]
+        context = QueryContext(query, orchestrator.query_encoder)
+        route_result = orchestrator.router.route_query(query, query_context=context)
+        self._send_json(route_result)
+
+    def handle_retrieve(self, payload, resources):
+        orchestrator = resources["orchestrator"]
+        query = payload["query"]
+        context = QueryContext(query, orchestrator.query_encoder)
+        intent = payload.get("intent")
+        if intent is None:
+            route_result = orchestrator.router.route_query(query, query_context=context)
+            if not route_result["allowed"]:
+                self._send_json({"allowed": False, "results": []})
+                return
+            intent = route_result["intent"]
+        results = orchestrator.retriever.search(query, intent, top_k=payload.get("top_k", 5),
+                                                query_context=context)
+        self._send_json({"allowed": True, "intent": intent, "results": results})
+
+    def handle_answer(self, payload, resources):
+        orchestrator = resources["orchestrator"]
+        chain = resources["chain"]
+        response_cache = resources["response_cache"]
+        metrics = resources["metrics"]
+        stream = bool(payload.get("stream", True))
+
+        results = orchestrator.handle_query(payload["query"])
+        if results['status'] != "success":
+            response = results['response']
+        else:
+            response = response_cache.lookup(results['query_embedding'], results['cache_key'])
+
+        if response is not None:
+            if results['status'] == "success":
+                metrics.incr("response_cache_hits")
+            if stream:
+                self._stream_text([response])
+            else:
+                self._send_json({"status": results['status'], "response": response})
+            return
+
+        llm_inputs = build_llm_inputs(results)
+        if not stream:
+            with metrics.timer("llm_total"):
+                response = chain.invoke(llm_inputs)
+            response_cache.store(results['query_embedding'], results['cache_key'], response)
+            self._send_json({"status": "success", "response": response})
+            return
+
+        parts = []
+        def tokens():
+            for token in timed_stream(metrics, chain.stream(llm_inputs)):
+                parts.append(token)
+                yield token
+        self._stream_text(tokens())
+        response_cache.store(results['query_embedding'], results['cache_key'], "".join(parts))
+
+def serve_worker(server):
+    # Warm start before accepting requests: model, embeddings and data are loaded once per worker
+    if isinstance(server.resources, ProfileRegistry):
+        server.resources.warm()
+    else:
+        server.resources.get()
+    print(f"Worker {os.getpid()} ready.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+def main(args):
+    secrets = load_secrets(args.secrets)
+    if "encode_key" not in secrets:
+        raise FileNotFoundError("Could not load encryption key!")
+    if args.llm == "groq" and "api_key" not in secrets:
+        raise FileNotFoundError("Could not load API key!")
+
+    server = ThreadingHTTPServer((args.host, args.port), CVRequestHandler)
+    server.verbose = args.verbose
+    if args.profiles_dir:
+        # Many candidates: shared model and anchors, per-profile data loaded on demand
+        server.resources = ProfileRegistry(secrets["encode_key"], secrets.get("api_key"), args.profiles_dir,
+                                           args.anchors_path, max_profiles=args.max_profiles,
+                                           default_profile=args.default_profile, llm_backend=args.llm)
+    else:
+        server.resources = get_shared_resources(secrets["encode_key"], secrets.get("api_key"),
+                                                args.anchors_path, args.data_path, args.contacts_path,
+                                                llm_backend=args.llm)
+    if args.metrics or args.trace:
+        server.resources.metrics.enabled = True
+        server.resources.metrics.trace = args.trace
+        logging.basicConfig(level=logging.INFO)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} worker(s), LLM backend '{args.llm}'.")
+
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        serve_worker(server)
+        return
+
+    # Pre-fork: every worker accepts on the same listening socket and loads the
+    # model from the same on-disk cache (the embedding store is memory-mapped,
+    # so its pages are shared by the OS)
+    children = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            serve_worker(server)
+            os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for pid in children:
+        os.waitpid(pid, 0)
+    server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8000)
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--llm", type=str, default="groq", choices=["groq", "fake"])
+    parser.add_argument("--secrets", type=str, default=".streamlit/secrets.toml")
+    parser.add_argument("--anchors_path", type=str, default=DEFAULT_PATHS["anchors_path"])
+    parser.add_argument("--data_path", type=str, default=DEFAULT_PATHS["data_path"])
+    parser.add_argument("--contacts_path", type=str, default=DEFAULT_PATHS["contacts_path"])
+    parser.add_argument("--profiles_dir", type=str, default=None, help="Serve every <profile>/ sub-directory of this one")
+    parser.add_argument("--default_profile", type=str, default=None)
+    parser.add_argument("--max_profiles", type=int, default=8, help="Profiles kept loaded (least recently used are evicted)")
+    parser.add_argument("--metrics", action="store_true", help="Collect per-stage latency metrics (GET /metrics)")
+    parser.add_argument("--trace", action="store_true", help="Also log one JSON timing line per request")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:10:27 2026
+
+@author: tienn
+"""
+import threading
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from chatbot.batchEncoder import BatchingEncoder
+from chatbot.hashingEncoder import HashingEncoder
+
+class CountingModel:
+    def __init__(self, fail_with=None):
+        self.model = HashingEncoder(dim=16)
+        self.calls = 0
+        self.fail_with = fail_with
+
+    def encode(self, sentences, **kwargs):
+        self.calls += 1
+        if self.fail_with is not None:
+            raise self.fail_with
+        return self.model.encode(sentences, convert_to_numpy=True)
+
+class Interrupt(BaseException):
+    pass
+
+def test_concurrent_encodes_are_batched():
+    model = CountingModel()
+    encoder = BatchingEncoder(model, max_batch_size=64, max_wait_ms=50)
+    texts = [f"query {i}" for i in range(40)]
+    with ThreadPoolExecutor(max_workers=40) as pool:
+        vectors = list(pool.map(encoder.encode, texts))
+    encoder.close()
+    np.testing.assert_allclose(np.stack(vectors), model.model.encode(texts, convert_to_numpy=True), atol=1e-6)
+    assert model.calls < len(texts)
+
+def test_close_encodes_queued_requests_then_refuses_new_ones():
+    encoder = BatchingEncoder(CountingModel(), max_wait_ms=200)
+    futures = [encoder.submit(f"query {i}") for i in range(5)]
+    encoder.close()
+    assert all(f.result(timeout=5).shape == (16,) for f in futures)
+    with pytest.raises(RuntimeError):
+        encoder.submit("late")
+    encoder.close()
+
+def test_submit_racing_close_never_hangs():
+    for _ in range(20):
+        encoder = BatchingEncoder(CountingModel(), max_wait_ms=0.1)
+        futures, stop = [], threading.Event()
+        def submit_loop():
+            while not stop.is_set():
+                try:
+                    futures.append(encoder.submit("query"))
+                except RuntimeError:
+                    return
+        thread = threading.Thread(target=submit_loop)
+        thread.start()
+        encoder.close()
+        stop.set()
+        thread.join()
+        # Every accepted request was resolved
+        assert all(f.done() for f in futures)
+
+def test_model_errors_fail_the_batch_only():
+    model = CountingModel(fail_with=ValueError("boom"))
+    encoder = BatchingEncoder(model)
+    with pytest.raises(ValueError):
+        encoder.encode("query")
+    # Options that can not be grouped fail their request, the worker keeps serving
+    with pytest.raises(TypeError):
+        encoder.submit("query", weird=[1]).result(timeout=5)
+    model.fail_with = None
+    assert encoder.encode("query").shape == (16,)
+    encoder.close()
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_base_exceptions_resolve_pending_futures():
+    encoder = BatchingEncoder(CountingModel(fail_with=Interrupt()), max_wait_ms=50)
+    futures = [encoder.submit(f"query {i}") for i in range(3)]
+    for future in futures:
+        with pytest.raises(Interrupt):
+            future.result(timeout=5)
+    encoder._worker.join(timeout=5)
+    # The worker is gone: new requests are refused instead of waiting forever
+    with pytest.raises(RuntimeError):
+        encoder.submit("query")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:02:37 2026
+
+@author: tienn
+"""
+import io
+import json
+import contextlib
+from cryptography.fernet import Fernet
+from tools.build_cv import build
+from tools.chunk_ids import content_digest
+
+CONTACTS = {"email_add": "candidate@example.com", "phone_num": "+00 000 000"}
+ANCHORS = {"skills": ["What programming languages do you know?"]}
+
+def cv(details):
+    return {"experience": [{"company": "Org", "title": "Engineer", "from": "2020-01", "to": "2021-01",
+                            "items": [{"details": d, "skills": ["python"]} for d in details]}]}
+
+def run_build(tmp_path, key, details):
+    for name, payload in (("cv.json", cv(details)), ("anchors.json", ANCHORS), ("contacts.json", CONTACTS)):
+        (tmp_path / name).write_text(json.dumps(payload), encoding="utf-8")
+    with contextlib.redirect_stdout(io.StringIO()):
+        return build(str(tmp_path / "cv.json"), str(tmp_path / "anchors.json"), str(tmp_path / "contacts.json"),
+                     str(tmp_path / "data"), key, embed=False)
+
+def test_manifest_does_not_confirm_guessed_plaintext(tmp_path):
+    key = Fernet.generate_key()
+    manifest = run_build(tmp_path, key, ["Built a pipeline."])
+    text = (tmp_path / "data" / "manifest.json").read_text(encoding="utf-8")
+    # Unkeyed hashes of the payloads must not appear anywhere in the clear manifest
+    for payload in (CONTACTS, ANCHORS):
+        assert content_digest(payload, length=16) not in text
+    assert CONTACTS["email_add"] not in text
+    assert set(manifest["files"]) == {"anchors", "cv_atomic_db", "contacts"}
+
+def test_incremental_rebuild(tmp_path):
+    key = Fernet.generate_key()
+    first = run_build(tmp_path, key, ["Built a pipeline."])
+    # Nothing changed: nothing re-encrypted, same version
+    assert run_build(tmp_path, key, ["Built a pipeline."])["version"] == first["version"]
+    second = run_build(tmp_path, key, ["Built a pipeline.", "Led a team."])
+    assert second["version"] != first["version"]
+    assert second["changes"] == {"added": 1, "removed": 0, "rewritten": ["cv_atomic_db"]}
+    # A new key re-encrypts every file and changes every digest
+    third = run_build(tmp_path, Fernet.generate_key(), ["Built a pipeline.", "Led a team."])
+    assert sorted(third["changes"]["rewritten"]) == ["anchors", "contacts", "cv_atomic_db"]
+    assert third["files"]["contacts"]["hmac"] != second["files"]["contacts"]["hmac"]
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:41:05 2026
+
+@author: tienn
+"""
+import io
+import contextlib
+import numpy as np
+import pytest
+from chatbot.hashingEncoder import HashingEncoder
+from chatbot.retrievalEngine import CVRetrievalEngine
+from chatbot.contextPacker import ContextPacker
+
+TEXTS = ["Built a data pipeline in Python with Airflow and Spark.",
+         "Taught an introductory course on linear algebra to first-year students.",
+         "Led the migration of the billing service from Java to Go."]
+
+def corpus(ids):
+    return [{"text": text, "context_str": f"Role {i}", "skills": ["python"], "type": "experience", **ids(i)}
+            for i, text in enumerate(TEXTS)]
+
+@pytest.mark.parametrize("ids", [lambda i: {},                 # no ids at all
+                                 lambda i: {"id": "same"}],    # hand-built database with repeated ids
+                         ids=["no_ids", "duplicate_ids"])
+def test_distinct_chunks_are_not_packed_as_duplicates(ids):
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = CVRetrievalEngine(HashingEncoder(), corpus(ids))
+    results = engine.search("Tell me about your work", "experience", top_k=3)
+    assert len(results) == 3
+
+    vectors = engine.result_vectors(results)
+    expected = engine.corpus_embeddings.vectors([TEXTS.index(r["content"]) for r in results])
+    np.testing.assert_allclose(vectors, expected, atol=1e-6)
+
+    packer = ContextPacker(token_budget=1000, min_score=-1.0)
+    assert len(packer.pack(results, vectors)) == 3
+
+def test_exact_duplicates_are_dropped():
+    results = [{"score": 0.9 - 0.1 * i, "context": "Role", "content": "Same text."} for i in range(3)]
+    assert len(ContextPacker(min_score=-1.0).pack(results)) == 1
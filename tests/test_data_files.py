@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:05:33 2026
+
+@author: tienn
+"""
+import os
+import io
+import contextlib
+from cryptography.fernet import Fernet
+from chatbot.resources import prefer_container, data_version
+from chatbot.hashingEncoder import HashingEncoder
+from chatbot.orchestrator import CVOrchestrator
+from tools.pickle_data import SecureDataTool
+from tools.secure_container import (SecureContainer, load_encrypted, open_encrypted, write_container,
+                                    convert_pickle, container_path)
+from benchmarks.bench_pipeline import ANCHORS, synthetic_database
+
+def chunks(n):
+    return [{"id": f"c{i}", "text": f"chunk {i}"} for i in range(n)]
+
+def touch_later(path, reference):
+    # mtime strictly after `reference`, whatever the file system's timestamp resolution
+    later = os.path.getmtime(reference) + 2
+    os.utime(path, (later, later))
+
+def test_newest_of_pickle_and_container_wins(tmp_path):
+    key = Fernet.generate_key()
+    tool = SecureDataTool(key)
+    pickle_path = str(tmp_path / "cv_atomic_db.pkl")
+
+    tool.dump_encrypted_pickle(chunks(2), pickle_path)
+    assert prefer_container(pickle_path) == pickle_path
+
+    # Converted once: the container supersedes the pickle
+    convert_pickle(pickle_path, key)
+    touch_later(container_path(pickle_path), pickle_path)
+    assert prefer_container(pickle_path) == container_path(pickle_path)
+
+    # Rebuilt later as a pickle: the stale container must not be served
+    tool.dump_encrypted_pickle(chunks(3), pickle_path)
+    touch_later(pickle_path, container_path(pickle_path))
+    assert prefer_container(pickle_path) == pickle_path
+    assert len(load_encrypted(prefer_container(pickle_path), key)) == 3
+
+def test_data_version_follows_the_served_file(tmp_path):
+    key = Fernet.generate_key()
+    paths = {name: str(tmp_path / f"{name}.pkl") for name in ("anchors", "cv_atomic_db", "contacts")}
+    for path in paths.values():
+        SecureDataTool(key).dump_encrypted_pickle({}, path)
+    before = data_version({"data_path": paths["cv_atomic_db"], "anchors_path": paths["anchors"],
+                           "contacts_path": paths["contacts"]})
+    convert_pickle(paths["cv_atomic_db"], key)
+    touch_later(container_path(paths["cv_atomic_db"]), paths["cv_atomic_db"])
+    after = data_version({"data_path": paths["cv_atomic_db"], "anchors_path": paths["anchors"],
+                          "contacts_path": paths["contacts"]})
+    assert before != after
+
+def test_orchestrator_on_open_containers(tmp_path):
+    key = Fernet.generate_key()
+    database = synthetic_database(60)
+    contacts = {"email_add": "candidate@example.com", "phone_num": "000"}
+    # Small blocks: records are spread over many of them
+    write_container(database, str(tmp_path / "db.cvc"), key, block_bytes=2048)
+    write_container(contacts, str(tmp_path / "contacts.cvc"), key)
+    lazy_database = open_encrypted(str(tmp_path / "db.cvc"), key, cache_blocks=2)
+    lazy_contacts = open_encrypted(str(tmp_path / "contacts.cvc"), key)
+    assert isinstance(lazy_database, SecureContainer) and len(lazy_database.blocks) > 2
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        plain = CVOrchestrator(ANCHORS, database, contacts, embedding_model=HashingEncoder())
+        lazy = CVOrchestrator(ANCHORS, lazy_database, lazy_contacts, embedding_model=HashingEncoder())
+    for query in ["Tell me about your work experience.", "How can I contact you?",
+                  "How many years of Python do you have?"]:
+        expected = plain.handle_query(query)
+        result = lazy.handle_query(query)
+        assert {k: v for k, v in result.items() if k != "query_embedding"} == \
+               {k: v for k, v in expected.items() if k != "query_embedding"}
+    assert len(lazy_database._cache) <= 2
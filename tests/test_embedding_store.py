@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:58:14 2026
+
+@author: tienn
+"""
+import io
+import os
+import json
+import contextlib
+import multiprocessing
+import numpy as np
+import pytest
+from chatbot.embeddingStore import EmbeddingStore, MIN_CAPACITY, fcntl
+from chatbot.hashingEncoder import HashingEncoder
+from chatbot.vectorIndex import normalize_rows
+
+def texts_of(worker, rounds=5, per_round=40):
+    return [[f"worker {worker} round {r} text {i}" for i in range(per_round)] for r in range(rounds)]
+
+def append_rounds(directory, worker):
+    # Every worker opens the store before the others write, then appends in small rounds
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = EmbeddingStore(directory, HashingEncoder(), "hashing")
+        for texts in texts_of(worker):
+            store.encode(texts)
+
+@pytest.mark.skipif(fcntl is None or "fork" not in multiprocessing.get_all_start_methods(),
+                    reason="needs fcntl and fork")
+def test_concurrent_writers_keep_keys_and_rows_aligned(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=append_rounds, args=(str(tmp_path), w)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+
+    model = HashingEncoder()
+    store = EmbeddingStore(str(tmp_path), model, "hashing")
+    texts = [t for w in range(4) for batch in texts_of(w) for t in batch]
+    assert len(store.keys) == len(texts) == len(set(store.keys))
+    # Every key's row holds that text's vector (no rows shifted by an interleaved write)
+    rows = [store.rows[store.key(t)] for t in texts]
+    expected = normalize_rows(np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32))
+    np.testing.assert_allclose(np.asarray(store.vectors[rows]), expected, atol=1e-6)
+
+def test_appends_write_in_place_with_geometric_growth(tmp_path):
+    model = HashingEncoder(dim=32)
+    store = EmbeddingStore(str(tmp_path), model, "hashing")
+    first = store.encode([f"text {i}" for i in range(10)])
+    first_copy = np.array(first)
+    inode = os.stat(store.vectors_path).st_ino
+    assert os.path.getsize(store.vectors_path) == MIN_CAPACITY * 32 * 4
+
+    sizes = set()
+    for r in range(12):
+        store.encode([f"round {r} text {i}" for i in range(200)])
+        sizes.add(os.path.getsize(store.vectors_path) // (32 * 4))
+        # Same file, extended: views handed out earlier still read the same rows
+        assert os.stat(store.vectors_path).st_ino == inode
+        np.testing.assert_array_equal(first, first_copy)
+    assert sizes == {1024, 2048, 4096}
+
+    texts = [f"round {r} text {i}" for r in range(12) for i in range(200)]
+    reopened = EmbeddingStore(str(tmp_path), model, "hashing")
+    assert len(reopened.keys) == 10 + len(texts)
+    expected = normalize_rows(np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32))
+    np.testing.assert_allclose(reopened.encode(texts), expected, atol=1e-6)
+
+def test_exact_size_store_is_extended(tmp_path):
+    # Stores written before the preallocation hold exactly one row per key
+    model = HashingEncoder(dim=8)
+    vectors = normalize_rows(np.asarray(model.encode(["a", "b"], convert_to_numpy=True), dtype=np.float32))
+    store = EmbeddingStore(str(tmp_path), model, "hashing")
+    vectors.tofile(store.vectors_path)
+    with open(store.index_path, "w", encoding="utf-8") as f:
+        json.dump({"model_name": "hashing", "dim": 8, "keys": [store.key("a"), store.key("b")]}, f)
+
+    store = EmbeddingStore(str(tmp_path), model, "hashing")
+    result = store.encode(["b", "c", "a"])
+    expected = normalize_rows(np.asarray(model.encode(["b", "c", "a"], convert_to_numpy=True), dtype=np.float32))
+    np.testing.assert_allclose(result, expected, atol=1e-6)
+    assert store.keys[:2] == [store.key("a"), store.key("b")]
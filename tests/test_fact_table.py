@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:20:16 2026
+
+@author: tienn
+"""
+from datetime import datetime
+from chatbot.factTable import FactTable
+
+DATABASE = [{"text": "Backend work.", "skills": ["Python", "Go"], "type": "experience",
+             "start_date": "2020-01-01", "end_date": "2021-12-01"},
+            {"text": "Current role.", "skills": ["Python"], "type": "experience",
+             "start_date": "2022-01-01", "end_date": "present"}]
+
+class FakeClock:
+    def __init__(self, today):
+        self.today = today
+
+    def __call__(self):
+        return self.today
+
+def test_facts_follow_the_clock_across_months():
+    clock = FakeClock(datetime(2023, 12, 15))
+    facts = FactTable(DATABASE, refresh_interval=0.0, clock=clock)
+    assert facts.get_skill_months("python") == 24 + 24
+    assert facts.get_skill_months("Go") == 24
+    assert facts.get_total_years() == 4.0
+    revision = facts.revision
+
+    # Same month: nothing recomputed
+    clock.today = datetime(2023, 12, 31)
+    assert facts.get_skill_months("python") == 48
+    assert facts.revision == revision
+
+    # Across the month boundary: the "present" row grows, the fixed one does not
+    clock.today = datetime(2024, 1, 1)
+    assert facts.get_skill_months("python") == 49
+    assert facts.get_skill_months("Go") == 24
+    assert facts.get_total_years() == round(49 / 12.0, 2)
+    assert facts.get_years("python", start=datetime(2024, 1, 1)) == round(1 / 12.0, 2)
+    assert facts.revision == revision + 1
+
+def test_refresh_interval_delays_the_update():
+    clock = FakeClock(datetime(2023, 12, 15))
+    facts = FactTable(DATABASE, refresh_interval=3600.0, clock=clock)
+    clock.today = datetime(2024, 2, 1)
+    assert facts.get_skill_months("python") == 48
+    facts.refresh(force=True)
+    assert facts.get_skill_months("python") == 50
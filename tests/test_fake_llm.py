@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:02:48 2026
+
+@author: tienn
+
+Async answers and streaming end to end, with the offline fake LLM.
+"""
+import io
+import asyncio
+import contextlib
+import pytest
+from chatbot.hashingEncoder import HashingEncoder
+from chatbot.orchestrator import CVOrchestrator
+from chatbot.llm import build_chain, build_fake_llm, build_llm_inputs
+from benchmarks.bench_pipeline import ANCHORS, synthetic_database
+
+pytest.importorskip("langchain_core")
+
+ANSWERS = ["First fake answer.", "Second fake answer."]
+ALLOWED = "Tell me about your work experience."
+BLOCKED = "What is the weather in Paris tomorrow?"
+
+@pytest.fixture(scope="module")
+def orchestrator():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return CVOrchestrator(ANCHORS, synthetic_database(30),
+                              {"email_add": "candidate@example.com", "phone_num": "000"},
+                              embedding_model=HashingEncoder())
+
+def test_aanswer(orchestrator):
+    llm = build_fake_llm(ANSWERS)
+    chain = build_chain(llm)
+    results = asyncio.run(orchestrator.aanswer(ALLOWED, chain))
+    assert results == {"status": "success", "response": ANSWERS[0]}
+
+    # Blocked queries never reach the LLM: the next call still gets the second answer
+    blocked = asyncio.run(orchestrator.aanswer(BLOCKED, chain))
+    assert blocked["status"] == "blocked"
+    assert blocked["response"] == orchestrator.handle_query(BLOCKED)["response"]
+    assert asyncio.run(orchestrator.aanswer(ALLOWED, chain))["response"] == ANSWERS[1]
+
+def test_concurrent_answers(orchestrator):
+    chain = build_chain(build_fake_llm(ANSWERS[:1], sleep=0.001))
+    async def answers(queries):
+        return await asyncio.gather(*(orchestrator.aanswer(q, chain) for q in queries))
+    results = asyncio.run(answers([ALLOWED, BLOCKED, ALLOWED]))
+    assert [r["status"] for r in results] == ["success", "blocked", "success"]
+    assert results[0]["response"] == results[2]["response"] == ANSWERS[0]
+
+def test_streamed_output_matches_invoke(orchestrator):
+    results = asyncio.run(orchestrator.ahandle_query(ALLOWED))
+    assert results == orchestrator.handle_query(ALLOWED)
+    inputs = build_llm_inputs(results)
+
+    tokens = list(build_chain(build_fake_llm(ANSWERS[:1])).stream(inputs))
+    assert len(tokens) > 1
+    assert "".join(tokens) == build_chain(build_fake_llm(ANSWERS[:1])).invoke(inputs) == ANSWERS[0]
+
+    async def astream():
+        return [token async for token in build_chain(build_fake_llm(ANSWERS[:1])).astream(inputs)]
+    assert "".join(asyncio.run(astream())) == ANSWERS[0]
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:31:52 2026
+
+@author: tienn
+"""
+import sys
+import subprocess
+
+def test_utils_import_does_not_load_numpy():
+    # The pure date and skill math must stay importable in milliseconds
+    code = "import sys, chatbot.utils; print('numpy' in sys.modules)"
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert output.strip() == "False"
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:08:51 2026
+
+@author: tienn
+
+MonthIntervals (vectorized unions) checked against plain sets of months.
+"""
+import random
+import numpy as np
+from datetime import datetime
+from chatbot.intervals import MonthIntervals, month_index, union_lengths
+from chatbot.utils import merged_months, compute_skill_experience
+
+SKILLS = ["Python", "python ", "SQL", "Docker", "Go", "Spark"]
+TYPES = ["experience", "education", "project"]
+
+def random_date(rng):
+    return datetime(rng.randint(2000, 2025), rng.randint(1, 12), rng.randint(1, 28))
+
+def random_rows(rng, n):
+    rows = []
+    for _ in range(n):
+        # Swapped start / end dates are allowed, like in hand-written CVs
+        rows.append({"start_date": random_date(rng), "end_date": random_date(rng),
+                     "type": rng.choice(TYPES), "skills": rng.sample(SKILLS, rng.randint(0, 3)),
+                     "name": "Org", "role": "Role", "location": "", "text": ""})
+    return rows
+
+def month_set(row, ongoing, today, start=None, end=None):
+    """
+    Reference: every month a row covers (inclusive), clipped to the window.
+    """
+    first = min(month_index(row["start_date"]), month_index(row["end_date"]))
+    last = max(month_index(row["start_date"]), month_index(row["end_date"]))
+    if ongoing:
+        last = max(first, month_index(today))
+    if start is not None:
+        first = max(first, month_index(start))
+    if end is not None:
+        last = min(last, month_index(end))
+    return set(range(first, last + 1))
+
+def reference_months(rows, ongoing, today, keep, start=None, end=None):
+    months = set()
+    for row, is_ongoing in zip(rows, ongoing):
+        if keep(row):
+            months |= month_set(row, is_ongoing, today, start, end)
+    return len(months)
+
+def test_matches_month_set_unions():
+    rng = random.Random(0)
+    for _ in range(300):
+        rows = random_rows(rng, rng.randint(0, 15))
+        ongoing = [rng.random() < 0.2 for _ in rows]
+        today = random_date(rng)
+        intervals = MonthIntervals(rows, ongoing, today)
+
+        skills = {s.strip().lower() for r in rows for s in r["skills"]}
+        has_skill = lambda skill: (lambda r: skill in {s.strip().lower() for s in r["skills"]})
+        assert intervals.skill_months() == {s: reference_months(rows, ongoing, today, has_skill(s)) for s in skills}
+        types = {r["type"] for r in rows}
+        assert intervals.type_months() == {t: reference_months(rows, ongoing, today, lambda r, t=t: r["type"] == t)
+                                           for t in types}
+
+        # Windowed queries, with and without skill / type filters (unknown ones give 0)
+        start, end = sorted([random_date(rng), random_date(rng)])
+        for skill in list(skills)[:2] + ["cobol", None]:
+            for chunk_type in [rng.choice(TYPES), None]:
+                keep = lambda r: ((skill is None or has_skill(skill)(r)) and
+                                  (chunk_type is None or r["type"] == chunk_type))
+                assert intervals.months(skill, chunk_type) == reference_months(rows, ongoing, today, keep)
+                assert intervals.months(skill, chunk_type, start, end) == \
+                    reference_months(rows, ongoing, today, keep, start, end)
+
+def test_set_today_moves_ongoing_rows_only():
+    rows = [{"start_date": datetime(2020, 1, 1), "end_date": datetime(2020, 6, 1), "type": "experience", "skills": ["Go"]},
+            {"start_date": datetime(2021, 1, 1), "end_date": datetime(2021, 1, 1), "type": "experience", "skills": ["Go"]}]
+    intervals = MonthIntervals(rows, [False, True], datetime(2021, 12, 15))
+    assert intervals.skill_months() == {"go": 6 + 12}
+    intervals.set_today(datetime(2022, 12, 15))
+    assert intervals.skill_months() == {"go": 6 + 24}
+
+def test_union_lengths_per_group():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n, n_groups = int(rng.integers(0, 30)), int(rng.integers(1, 5))
+        groups = rng.integers(0, n_groups, n)
+        starts = rng.integers(-50, 50, n)
+        ends = starts + rng.integers(0, 20, n)
+        expected = [len(set().union(*[range(s, e) for g, s, e in zip(groups, starts, ends) if g == group]))
+                    for group in range(n_groups)]
+        assert union_lengths(groups, starts, ends, n_groups).tolist() == expected
+
+def test_utils_wrappers_use_the_same_unions():
+    rng = random.Random(1)
+    for _ in range(50):
+        rows = random_rows(rng, rng.randint(1, 10))
+        today = datetime.today()
+        assert merged_months(rows) == reference_months(rows, [False] * len(rows), today, lambda r: True)
+        for skill, data in compute_skill_experience(rows).items():
+            keep = lambda r: skill in {s.strip().lower() for s in r["skills"]}
+            assert data["months"] == reference_months(rows, [False] * len(rows), today, keep)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:06:52 2026
+
+@author: tienn
+
+BM25 shortlist and score fusion checked against plain-Python references.
+"""
+import io
+import math
+import random
+import contextlib
+import numpy as np
+import pytest
+from chatbot.lexicalIndex import LexicalIndex, fuse_scores, tokenize
+from chatbot.hashingEncoder import HashingEncoder
+from chatbot.retrievalEngine import CVRetrievalEngine
+
+WORDS = ["python", "docker", "c++", "c#", "node.js", "spark", "airflow", "billing", "service", "migration",
+         "team", "students", "course", "pipeline", "data", "kubernetes", "go", "java", "the", "with"]
+
+def random_texts(rng, n):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))) for _ in range(n)]
+
+def reference_bm25(texts, query, k1=1.2, b=0.75, max_df=0.5):
+    docs = [tokenize(t) for t in texts]
+    avg_length = (sum(map(len, docs)) / len(docs)) or 1.0
+    scores = [0.0] * len(docs)
+    for term in set(tokenize(query)):
+        df = sum(term in doc for doc in docs)
+        if df == 0 or df > max_df * len(docs):
+            continue
+        idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+        for i, doc in enumerate(docs):
+            tf = doc.count(term)
+            if tf:
+                scores[i] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_length))
+    return np.array(scores)
+
+def test_scores_match_reference():
+    rng = random.Random(0)
+    for _ in range(100):
+        texts = random_texts(rng, rng.randint(1, 40))
+        index = LexicalIndex(texts)
+        for query in random_texts(rng, 5):
+            np.testing.assert_allclose(index.scores(query), reference_bm25(texts, query), rtol=1e-5, atol=1e-6)
+
+def test_shortlist_keeps_the_best_matches():
+    rng = random.Random(1)
+    for _ in range(100):
+        texts = random_texts(rng, rng.randint(1, 60))
+        index = LexicalIndex(texts)
+        query = " ".join(rng.sample(WORDS, 3))
+        rows = sorted(rng.sample(range(len(texts)), rng.randint(1, len(texts))))
+        size = rng.randint(1, 10)
+        reference = reference_bm25(texts, query)
+        shortlist, scores = index.shortlist(query, size, rows)
+
+        matched = [r for r in rows if reference[r] > 0]
+        assert len(shortlist) == min(size, len(matched))
+        assert set(shortlist) <= set(matched)
+        np.testing.assert_allclose(scores, reference[shortlist], rtol=1e-5)
+        # Nothing left out scores better than what was kept
+        left_out = [reference[r] for r in matched if r not in set(shortlist)]
+        if left_out and len(shortlist):
+            assert max(left_out) <= min(reference[shortlist]) + 1e-5
+
+def test_fuse_scores():
+    dense = np.array([0.9, 0.5, 0.4], dtype=np.float32)
+    lexical = np.array([0.0, 4.0, 2.0], dtype=np.float32)
+    np.testing.assert_allclose(fuse_scores(dense, lexical, 0.0), dense)
+    np.testing.assert_allclose(fuse_scores(dense, lexical, 1.0), [0.0, 1.0, 0.5])
+    np.testing.assert_allclose(fuse_scores(dense, lexical, 0.5), [0.45, 0.75, 0.45])
+    # No lexical signal at all: the dense order is kept
+    assert np.argsort(-fuse_scores(dense, np.zeros(3), 0.3)).tolist() == [0, 1, 2]
+
+@pytest.fixture(scope="module")
+def engines():
+    rng = random.Random(2)
+    corpus = [{"text": text, "context_str": f"Role {i}", "skills": [], "type": "experience"}
+              for i, text in enumerate(random_texts(rng, 300))]
+    with contextlib.redirect_stdout(io.StringIO()):
+        dense = CVRetrievalEngine(HashingEncoder(), corpus)
+        lexical = CVRetrievalEngine(HashingEncoder(), corpus, lexical=True, shortlist_size=20, lexical_weight=0.3)
+    return dense, lexical
+
+def test_search_orders_by_fused_score(engines):
+    dense, lexical = engines
+    query = "kubernetes migration billing"
+    results = lexical.search(query, "experience", top_k=5)
+    assert len(results) == 5
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+
+    # Same fused scores from the shortlist computed by hand
+    shortlist, bm25 = lexical.lexical_index.shortlist(query, 20)
+    fused = fuse_scores(dense.corpus_embeddings.scores(dense.model.encode([query])[0], rows=shortlist), bm25, 0.3)
+    expected = shortlist[np.argsort(-fused, kind="stable")[:5]]
+    assert [r["row"] for r in results] == expected.tolist()
+
+def test_search_falls_back_to_dense_without_term_matches(engines):
+    dense, lexical = engines
+    query = "tell me about yourself"
+    assert [r["row"] for r in lexical.search(query, "experience", top_k=5)] == \
+           [r["row"] for r in dense.search(query, "experience", top_k=5)]
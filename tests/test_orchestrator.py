@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:20:07 2026
+
+@author: tienn
+"""
+import io
+import contextlib
+from unittest import mock
+from chatbot.hashingEncoder import HashingEncoder
+from chatbot.metrics import PipelineMetrics
+from chatbot.orchestrator import CVOrchestrator
+from benchmarks.bench_pipeline import ANCHORS, synthetic_database
+
+def test_memo_hits_are_counted_as_requests():
+    metrics = PipelineMetrics(enabled=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        orchestrator = CVOrchestrator(ANCHORS, synthetic_database(30),
+                                      {"email_add": "candidate@example.com", "phone_num": "000"},
+                                      embedding_model=HashingEncoder(), metrics=metrics)
+    queries = ["Tell me about your work experience.", "Write me a poem about cats."]
+    statuses = [orchestrator.handle_query(q)["status"] for q in queries]
+    # Same questions again: served from the memo
+    statuses += [orchestrator.handle_query(q.upper())["status"] for q in queries]
+
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    assert counters["query_cache_hits"] == 2
+    assert sum(v for k, v in counters.items() if k.startswith("requests_")) == 4
+    for status in set(statuses):
+        assert counters[f"requests_{status}"] == statuses.count(status)
+    assert snapshot["histograms"]["pipeline_total"]["count"] == 4
+
+def test_one_trace_per_request_and_saved_tokens_only_with_metrics():
+    for enabled in [True, False]:
+        metrics = PipelineMetrics(enabled=enabled)
+        with contextlib.redirect_stdout(io.StringIO()):
+            orchestrator = CVOrchestrator(ANCHORS, synthetic_database(30),
+                                          {"email_add": "candidate@example.com", "phone_num": "000"},
+                                          embedding_model=HashingEncoder(), metrics=metrics)
+        with mock.patch.object(metrics, "start_trace", wraps=metrics.start_trace) as start_trace:
+            result = orchestrator.handle_query("Tell me about your work experience.")
+        assert result["status"] == "success"
+        if enabled:
+            assert start_trace.call_count == 1
+            assert result["prompt_tokens_saved"] >= 0
+            assert metrics.snapshot()["histograms"]["pipeline_total"]["count"] == 1
+        else:
+            assert result["prompt_tokens_saved"] is None
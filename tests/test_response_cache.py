@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:05:37 2026
+
+@author: tienn
+"""
+import io
+import contextlib
+import numpy as np
+from unittest import mock
+from chatbot.hashingEncoder import HashingEncoder
+from chatbot.orchestrator import CVOrchestrator
+from chatbot.responseCache import SemanticResponseCache, context_key
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_hits_need_the_same_context():
+    cache = SemanticResponseCache(threshold=0.9)
+    cache.store(unit(1, 0, 0), "facts-c++", "10 years of C++.")
+    assert cache.lookup(unit(1, 0.01, 0), "facts-c++") == "10 years of C++."
+    # Same question embedding, different facts: never the cached answer
+    assert cache.lookup(unit(1, 0.01, 0), "facts-c#") is None
+    assert cache.lookup(unit(0, 1, 0), "facts-c++") is None
+
+def test_lru_eviction_and_lazy_expiry():
+    cache = SemanticResponseCache(threshold=0.9, ttl=10, max_entries=2)
+    with mock.patch("time.time", return_value=0.0):
+        cache.store(unit(1, 0, 0), "a", "A")
+        cache.store(unit(0, 1, 0), "b", "B")
+        assert cache.lookup(unit(1, 0, 0), "a") == "A"      # "b" is now the least recently used
+        cache.store(unit(0, 0, 1), "c", "C")
+        assert cache.lookup(unit(0, 1, 0), "b") is None
+        assert cache.lookup(unit(1, 0, 0), "a") == "A"
+    with mock.patch("time.time", return_value=11.0):
+        assert cache.lookup(unit(1, 0, 0), "a") is None
+    assert cache.stats()["size"] == 1
+
+def test_skill_questions_get_distinct_keys():
+    database = [{"text": f"Wrote {skill} services.", "context_str": "Engineer at Org", "skills": [skill],
+                 "type": "experience", "start_date": "2015-01-01", "end_date": "2020-01-01"}
+                for skill in ["C++", "C#"]]
+    anchors = {"experience": ["How many years of experience do you have?"],
+               "unrelated": ["Write me a poem."]}
+    with contextlib.redirect_stdout(io.StringIO()):
+        orchestrator = CVOrchestrator(anchors, database, {"email_add": "", "phone_num": ""},
+                                      embedding_model=HashingEncoder())
+    keys, prompts = set(), set()
+    for query in ["How many years of C++ do you have?", "How many years of C# do you have?"]:
+        result = orchestrator.handle_query(query)
+        assert result["status"] == "success"
+        keys.add(result["cache_key"])
+        prompts.add(result["system_prompt"])
+    # Same prompt (same facts and snippet) but not the same skill: distinct keys
+    assert len(prompts) == 1 and len(keys) == 2
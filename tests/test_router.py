@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:41:12 2026
+
+@author: tienn
+
+Centroid probing and vote routing checked against a brute-force reference.
+"""
+import io
+import contextlib
+import numpy as np
+import pytest
+from chatbot.guardrailRouter import CVGuardrailRouter
+from chatbot.queryContext import QueryContext
+
+class VectorModel:
+    """
+    Stand-in encoder: every text is a key of a table of fixed vectors.
+    """
+    def __init__(self, table):
+        self.table = table
+
+    def encode(self, texts, convert_to_numpy=True):
+        if isinstance(texts, str):
+            return self.table[texts]
+        return np.stack([self.table[t] for t in texts])
+
+def random_router(rng, mode, n_probe=2, vote_k=1, n_intents=6, dim=16):
+    routes, table = {}, {}
+    for i in range(n_intents):
+        center = rng.normal(size=dim)
+        routes[f"intent_{i}"] = [f"anchor_{i}_{j}" for j in range(int(rng.integers(1, 6)))]
+        for anchor in routes[f"intent_{i}"]:
+            table[anchor] = center + rng.normal(scale=0.8, size=dim)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return CVGuardrailRouter(VectorModel(table), routes, mode=mode, n_probe=n_probe, vote_k=vote_k)
+
+def reference_match(router, query, probed, vote_k):
+    """
+    Per-query loops over the anchors of the probed intents.
+    """
+    anchors = [(float(router.anchor_embeddings.scores(query, [row])[0]), router.anchor_intent_ids[row])
+               for intent_id in probed for row in range(*router.intent_bounds[intent_id])]
+    intent_scores = {i: max(s for s, j in anchors if j == i) for i in probed}
+    if vote_k > 1:
+        votes = {}
+        for score, intent_id in sorted(anchors, key=lambda a: -a[0])[:vote_k]:
+            votes[intent_id] = votes.get(intent_id, 0.0) + score
+        best = max(votes, key=votes.get)
+    else:
+        best = max(intent_scores, key=intent_scores.get)
+    return best, intent_scores[best]
+
+@pytest.mark.parametrize("vote_k", [1, 3])
+@pytest.mark.parametrize("n_probe", [1, 2, 6])
+def test_centroid_matches_reference(n_probe, vote_k):
+    rng = np.random.default_rng(n_probe * 10 + vote_k)
+    for _ in range(20):
+        router = random_router(rng, "centroid", n_probe, vote_k)
+        queries = rng.normal(size=(8, 16)).astype(np.float32)
+        best, scores = router._match(queries)
+        for query, intent_id, score in zip(queries, best, scores):
+            if n_probe >= len(router.intents):
+                probed = range(len(router.intents))
+            else:
+                centroid_scores = router.centroids.scores(query)
+                probed = np.argsort(-centroid_scores)[:n_probe]
+            expected, expected_score = reference_match(router, query, probed, vote_k)
+            assert intent_id == expected
+            assert score == pytest.approx(expected_score, abs=1e-5)
+
+@pytest.mark.parametrize("vote_k", [1, 3])
+def test_exhaustive_matches_reference(vote_k):
+    rng = np.random.default_rng(vote_k)
+    for _ in range(20):
+        router = random_router(rng, "exhaustive", vote_k=vote_k)
+        queries = rng.normal(size=(8, 16)).astype(np.float32)
+        best, scores = router._match(queries)
+        for query, intent_id, score in zip(queries, best, scores):
+            expected, expected_score = reference_match(router, query, range(len(router.intents)), vote_k)
+            assert intent_id == expected
+            assert score == pytest.approx(expected_score, abs=1e-5)
+
+def test_probing_every_intent_is_exhaustive():
+    rng = np.random.default_rng(0)
+    router = random_router(rng, "centroid", n_probe=6)
+    reference = random_router(np.random.default_rng(0), "exhaustive")
+    queries = rng.normal(size=(50, 16)).astype(np.float32)
+    best, scores = router._match(queries)
+    ref_best, ref_scores = reference._match(queries)
+    np.testing.assert_array_equal(best, ref_best)
+    np.testing.assert_allclose(scores, ref_scores, atol=1e-6)
+
+def test_intents_without_votes_do_not_win():
+    # Every anchor is opposite to the query: all votes are negative, unvoted intents must not win
+    table = {"a": np.array([-0.8, 0.6]), "b": np.array([-0.8, -0.6]), "c": np.array([-1.0, 0.0])}
+    with contextlib.redirect_stdout(io.StringIO()):
+        router = CVGuardrailRouter(VectorModel(table), {"x": ["a", "b"], "y": ["c"]}, vote_k=2)
+    best, _ = router._match(np.array([[1.0, 0.0]], dtype=np.float32))
+    assert router.intents[int(best[0])] == "x"
+
+def test_route_queries_matches_route_query():
+    rng = np.random.default_rng(3)
+    router = random_router(rng, "exhaustive")
+    queries = list(router.model.table)[:6]
+    batch = router.route_queries(queries, threshold=-1.0)
+    contexts = [QueryContext.from_embedding(q, router.model.table[q]) for q in queries]
+    assert router.route_queries(queries, threshold=-1.0, query_contexts=contexts) == batch
+    assert [c.intent for c in contexts] == [r["intent"] for r in batch]
+    for query, result in zip(queries, batch):
+        single = router.route_query(query, threshold=-1.0)
+        assert single["intent"] == result["intent"]
+        assert single["score"] == pytest.approx(result["score"], abs=1e-6)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:40 2026
+
+@author: tienn
+
+In-process HTTP checks of the JSON API (offline: hashing encoder, no LLM).
+"""
+import json
+import threading
+import http.client
+import contextlib
+import io
+import pytest
+from http.server import ThreadingHTTPServer
+from server import CVRequestHandler
+from chatbot.hashingEncoder import HashingEncoder
+from chatbot.metrics import PipelineMetrics
+from chatbot.orchestrator import CVOrchestrator
+from benchmarks.bench_pipeline import ANCHORS, synthetic_database
+
+class StaticResources:
+    """
+    Same interface as SharedResources, around one prebuilt orchestrator.
+    """
+    def __init__(self, orchestrator):
+        self.metrics = PipelineMetrics(enabled=False)
+        self.response_cache = None
+        self.resources = {"orchestrator": orchestrator, "metrics": self.metrics}
+
+    def get(self):
+        return self.resources
+
+@pytest.fixture(scope="module")
+def server():
+    with contextlib.redirect_stdout(io.StringIO()):
+        orchestrator = CVOrchestrator(ANCHORS, synthetic_database(50),
+                                      {"email_add": "candidate@example.com", "phone_num": "000"},
+                                      embedding_model=HashingEncoder())
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), CVRequestHandler)
+    httpd.verbose = False
+    httpd.resources = StaticResources(orchestrator)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def post(server, path, payload):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.request("POST", path, body=json.dumps(payload), headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+def test_route_single(server):
+    status, body = post(server, "/route", {"query": "What programming languages do you know?"})
+    assert status == 200
+    assert "allowed" in body and "intent" in body
+
+def test_route_batch(server):
+    queries = ["What programming languages do you know?", "How can I contact you?", "Write me a poem about cats."]
+    status, body = post(server, "/route", {"queries": queries})
+    assert status == 200
+    assert len(body["results"]) == len(queries)
+    # Same decisions as routing the queries one by one
+    for query, result in zip(queries, body["results"]):
+        _, single = post(server, "/route", {"query": query})
+        assert result["intent"] == single["intent"]
+        assert result["allowed"] == single["allowed"]
+
+@pytest.mark.parametrize("payload", [{}, {"query": "  "}, {"queries": []}, {"queries": "not a list"},
+                                     {"queries": ["ok", ""]}])
+def test_route_rejects_invalid_bodies(server, payload):
+    status, body = post(server, "/route", payload)
+    assert status == 400
+    assert "error" in body
+
+@pytest.mark.parametrize("payload", [{"query": 5}, {"query": ["a"]}, {"query": "ok", "top_k": "abc"},
+                                     {"query": "ok", "top_k": 0}, {"query": "ok", "top_k": 2.5},
+                                     {"query": "ok", "top_k": True}, {"query": "ok", "intent": 3}])
+def test_retrieve_rejects_invalid_fields(server, payload):
+    status, body = post(server, "/retrieve", payload)
+    assert status == 400
+    assert "error" in body
+
+def test_retrieve_top_k(server):
+    status, body = post(server, "/retrieve", {"query": "Tell me about your work experience.",
+                                              "intent": "experience", "top_k": 2})
+    assert status == 200
+    assert len(body["results"]) == 2
+
+def test_queries_only_accepted_by_route(server):
+    status, _ = post(server, "/retrieve", {"queries": ["What did you study?"]})
+    assert status == 400
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:46:23 2026
+
+@author: tienn
+
+SkillMatcher (Aho-Corasick) checked against the regex it replaced.
+"""
+import re
+import random
+import pytest
+from chatbot.utils import SkillMatcher, match_skills
+
+def regex_match_skills(skills_list, text):
+    """
+    The original implementation, kept as the reference.
+    """
+    if not text or not skills_list:
+        return []
+    skills_list = sorted(skills_list, key=len, reverse=True)
+    escaped_skills = [re.escape(skill) for skill in skills_list]
+    pattern = r"(?<!\w)(" + "|".join(escaped_skills) + r")(?!\w)"
+    matches = re.findall(pattern, text, flags=re.IGNORECASE)
+    skill_map = {s.lower(): s for s in skills_list}
+    return list(set(skill_map[m.lower()] for m in matches if m.lower() in skill_map))
+
+def lowered(skills):
+    return {s.lower() for s in skills}
+
+SKILLS = ["C", "C++", "C#", ".NET", "ASP.NET", "Go", "Golang", "R", "React", "React Native", "Node.js",
+          "Python", "machine learning", "Machine Learning Ops", "SQL", "NoSQL", "T-SQL", "CI/CD", "a", "a.b"]
+SEPARATORS = [" ", " ", ", ", ". ", "/", "-", "(", ")", "+", "#", ".", "\n", "_", "'"]
+WORDS = ["with", "and", "in", "used", "x", "ing", "s", "2", "net", "cpp", "js", "learning", "native"]
+
+@pytest.mark.parametrize("text, expected", [
+    ("I used C++ and C# with .NET", {"c++", "c#", ".net"}),
+    ("React Native apps in react", {"react native", "react"}),
+    ("no skills in reactive code", set()),
+    ("golang, go and Go.", {"golang", "go"}),
+    ("CI/CD pipelines", {"ci/cd"}),
+])
+def test_examples(text, expected):
+    assert lowered(SkillMatcher(SKILLS).match(text)) == expected
+    assert lowered(regex_match_skills(SKILLS, text)) == expected
+
+def test_matches_the_regex_on_random_texts():
+    rng = random.Random(0)
+    for _ in range(3000):
+        vocabulary = rng.sample(SKILLS, rng.randint(1, len(SKILLS)))
+        # Random casing of the vocabulary and of the skills inside the text
+        vocabulary = [s.upper() if rng.random() < 0.2 else s for s in vocabulary]
+        parts = []
+        for _ in range(rng.randint(0, 12)):
+            token = rng.choice(SKILLS) if rng.random() < 0.6 else rng.choice(WORDS)
+            parts.append(token.swapcase() if rng.random() < 0.3 else token)
+            parts.append(rng.choice(SEPARATORS) if rng.random() < 0.9 else "")
+        text = "".join(parts)
+
+        expected = lowered(regex_match_skills(vocabulary, text))
+        assert lowered(SkillMatcher(vocabulary).match(text)) == expected, (vocabulary, text)
+        assert lowered(match_skills(vocabulary, text)) == expected, (vocabulary, text)
+
+def test_results_are_unique_and_in_order_of_appearance():
+    assert SkillMatcher(["Python", "SQL", "Docker"]).match("sql, then python, then SQL again") == ["SQL", "Python"]
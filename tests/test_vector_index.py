@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:48:30 2026
+
+@author: tienn
+
+Compact (float16 / int8) matrices and shortlist scoring checked against float32.
+"""
+import numpy as np
+import pytest
+from chatbot import vectorIndex
+from chatbot.vectorIndex import EmbeddingMatrix, compare_precisions, normalize_rows
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(2000, 384)).astype(np.float32), rng.normal(size=(100, 384)).astype(np.float32)
+
+def test_compact_precisions_keep_the_top_k(data):
+    embeddings, queries = data
+    report = compare_precisions(embeddings, queries, k=5)
+    assert report["float32"]["recall_at_k"] == 1.0
+    assert report["float16"]["recall_at_k"] >= 0.99
+    assert report["int8"]["recall_at_k"] >= 0.98
+    assert report["float16"]["max_abs_score_error"] < 1e-3
+    assert report["int8"]["max_abs_score_error"] < 1e-2
+    assert report["float16"]["bytes"] * 2 == report["float32"]["bytes"]
+    assert report["int8"]["bytes"] < report["float32"]["bytes"] / 3.9
+
+@pytest.mark.parametrize("precision", ["float32", "float16", "int8"])
+def test_topk_scores_are_cosines(data, precision):
+    embeddings, queries = data
+    index = EmbeddingMatrix(embeddings, precision)
+    reference = normalize_rows(embeddings) @ normalize_rows(queries[0])
+    best, scores = index.topk(queries[0], 5)
+    assert list(scores) == sorted(scores, reverse=True)
+    np.testing.assert_allclose(scores, reference[best], atol=1e-2)
+    if precision == "float32":
+        assert best.tolist() == np.argsort(-reference)[:5].tolist()
+    np.testing.assert_allclose(np.linalg.norm(index.vectors(best), axis=1), 1.0, atol=1e-5)
+    # Batch and single-query scoring agree
+    np.testing.assert_allclose(index.score_batch(queries[:3])[0], index.scores(queries[0]), atol=1e-5)
+
+@pytest.mark.parametrize("fraction", [0.01, 0.1, 0.149, 0.15, 0.3, 1.0])
+@pytest.mark.parametrize("precision", ["float32", "int8"])
+def test_gather_and_masked_paths_agree(data, monkeypatch, fraction, precision):
+    embeddings, queries = data
+    index = EmbeddingMatrix(embeddings, precision)
+    rng = np.random.default_rng(1)
+    rows = np.sort(rng.choice(len(embeddings), int(fraction * len(embeddings)), replace=False))
+    for k in [1, 5, len(rows) + 1]:
+        full = index.scores(queries[0])
+        expected = rows[np.argsort(-full[rows], kind="stable")][:k]
+        results = []
+        # Default cutoff, then each path forced
+        for cutoff in [vectorIndex.GATHER_MAX_FRACTION, 0.0, 1.01]:
+            monkeypatch.setattr(vectorIndex, "GATHER_MAX_FRACTION", cutoff)
+            best, scores = index.topk(queries[0], k, rows=rows)
+            assert best.tolist() == expected.tolist()
+            np.testing.assert_allclose(scores, full[expected], atol=1e-5)
+            results.append(scores)
+        np.testing.assert_allclose(results[1], results[2], atol=1e-6)
+
+def test_cutoff_selects_the_path(data, monkeypatch):
+    embeddings, queries = data
+    index = EmbeddingMatrix(embeddings)
+    calls = []
+    scores = index.scores
+    monkeypatch.setattr(index, "scores", lambda query, rows=None: calls.append(rows is not None) or scores(query, rows))
+    for n_rows, gathered in [(int(0.15 * len(embeddings)) - 1, True), (int(0.15 * len(embeddings)), False)]:
+        index.topk(queries[0], 5, rows=np.arange(n_rows))
+        assert calls.pop() == gathered
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:20:43 2026
+
+@author: tienn
+
+One-step, incremental build of the chatbot data: CV JSON -> atomic chunks
+(content-hashed ids) -> encrypted pickles -> embedding store -> manifest.
+
+    python -m tools.build_cv -i cv.json -a anchors.json -c contacts.json -o data
+
+Only what changed since the previous build is redone: a data file is only
+re-encrypted when its content changed, and only new chunk / anchor texts
+are sent to the embedding model. The manifest is written last and only when
+the content version changed; the running app watches it to reload and
+invalidate its caches.
+"""
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from tools.pickle_data import SecureDataTool, load_secret_key
+from tools.secure_container import write_container, CONTAINER_EXT
+from tools.chunk_ids import keyed_digest
+from tools.json_robust_to_atomic import convert_robust_to_atomic
+from tools.cvDataConvert import convert_nested_to_atomic
+from chatbot.resources import MANIFEST_NAME, load_manifest
+from chatbot.utils import load_data
+from typing import Dict, Any, List
+
+CONVERTERS = {"robust": convert_robust_to_atomic,
+              "nested": convert_nested_to_atomic}
+
+# Output file stem -> key in the manifest "files" section (names the runtime loads)
+OUTPUT_FILES = ("anchors", "cv_atomic_db", "contacts")
+
+def key_fingerprint(encode_key) -> str:
+    # Changing the key must re-encrypt everything; only a short hash of it is stored
+    key = encode_key if isinstance(encode_key, bytes) else encode_key.encode("utf-8")
+    return hashlib.sha256(key).hexdigest()[:12]
+
+def chunk_digests(atomic_db:List[Dict[str, Any]], encode_key) -> List[str]:
+    # The manifest is not encrypted and the ids derive from the content: keyed hashes only
+    return sorted(keyed_digest(doc["id"], encode_key, length=16) for doc in atomic_db)
+
+def embed_new_texts(output_dir:str, atomic_db:List[Dict[str, Any]], anchors:Dict[str, List[str]]) -> int:
+    """
+    Fills the runtime's embedding store with the texts it does not hold yet.
+    """
+    from chatbot.encoders import load_embedding_model, MODEL_NAME
+    from chatbot.embeddingStore import EmbeddingStore
+
+    store = EmbeddingStore(output_dir, load_embedding_model(MODEL_NAME), MODEL_NAME)
+    texts = [doc["text"] for doc in atomic_db] + [a for examples in anchors.values() for a in examples]
+    missing = len({store.key(t) for t in texts} - set(store.rows))
+    # Same calls as the router / retriever, so their warm start finds the rows
+    store.encode([doc["text"] for doc in atomic_db])
+    store.encode([a for examples in anchors.values() for a in examples])
+    return missing
+
+def build(cv_path:str, anchors_path:str, contacts_path:str, output_dir:str, encode_key,
+          input_format:str="robust", embed:bool=True, force:bool=False, container:bool=False) -> Dict[str, Any]:
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 1. Convert, ids are derived from the chunk content
+    atomic_db = CONVERTERS[input_format](load_data(cv_path))
+    anchors = load_data(anchors_path)
+    contacts = load_data(contacts_path)
+
+    # 2. Diff against the previous build
+    previous = load_manifest(output_dir) or {}
+    old_chunks = set(previous.get("chunks", []))
+    new_chunks = chunk_digests(atomic_db, encode_key)
+    added = len(set(new_chunks) - old_chunks)
+    removed = len(old_chunks - set(new_chunks))
+
+    # 3. Re-encrypt only the files whose content (or key) changed; a file is
+    # rewritten whole (one changed chunk re-encrypts the whole database)
+    fingerprint = key_fingerprint(encode_key)
+    rekey = force or previous.get("key_id") != fingerprint
+    tool = SecureDataTool(encode_key)
+    extension = CONTAINER_EXT if container else ".pkl"
+    files, rewritten = {}, []
+    for name, payload in zip(OUTPUT_FILES, (anchors, atomic_db, contacts)):
+        # Keyed: an unsalted hash of the contacts would let anyone confirm a guessed email
+        digest = keyed_digest(payload, encode_key)
+        path = os.path.join(output_dir, f"{name}{extension}")
+        recorded = previous.get("files", {}).get(name, {})
+        # A format switch rewrites the file too: the runtime loads whichever of .pkl / .cvc is newer
+        if rekey or not os.path.exists(path) or recorded.get("hmac") != digest or recorded.get("file") != f"{name}{extension}":
+            if container:
+                write_container(payload, path, encode_key)
+            else:
+                tool.dump_encrypted_pickle(payload, path)
+            rewritten.append(name)
+        files[name] = {"file": f"{name}{extension}", "hmac": digest}
+
+    # 4. Embed only the texts the store has never seen
+    embedded = embed_new_texts(output_dir, atomic_db, anchors) if embed else 0
+
+    # 5. Manifest, last. Its version changes exactly when the content does (it
+    # stamps the runtime caches), keyed like the other digests it sits next to
+    version = keyed_digest([anchors, atomic_db, contacts], encode_key, length=16)
+    manifest = {"version": version,
+                "built_at": datetime.now().isoformat(timespec="seconds"),
+                "key_id": fingerprint,
+                "files": files,
+                "chunks": new_chunks,
+                "changes": {"added": added, "removed": removed, "rewritten": rewritten}}
+    if rewritten or version != previous.get("version"):
+        tmp_path = os.path.join(output_dir, f"{MANIFEST_NAME}.tmp{os.getpid()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(output_dir, MANIFEST_NAME))
+    else:
+        manifest = previous
+
+    print(f"Build {version}: {len(atomic_db)} chunks ({added} added, {removed} removed), "
+          f"re-encrypted {rewritten or 'nothing'}, embedded {embedded} new texts.")
+    return manifest
+
+def main(args):
+    encode_key = args.key if args.key else load_secret_key(args.secrets)
+    build(args.input, args.anchors_path, args.contacts_path, args.output_dir, encode_key,
+          input_format=args.format, embed=not args.no_embed, force=args.force, container=args.container)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--input", type=str, required=True)
+    parser.add_argument("-a", "--anchors_path", type=str, default='anchors.json')
+    parser.add_argument("-c", "--contacts_path", type=str, default='contacts.json')
+    parser.add_argument("-o", "--output_dir", type=str, default='data')
+    parser.add_argument("-f", "--format", type=str, default="robust", choices=list(CONVERTERS))
+    parser.add_argument("--secrets", type=str, default=".streamlit/secrets.toml")
+    parser.add_argument("--key", type=str, default=None, help="Encryption key (default: encode_key from --secrets)")
+    parser.add_argument("--no_embed", action="store_true", help="Skip the embedding step (no model needed)")
+    parser.add_argument("--container", action="store_true", help="Write .cvc containers instead of pickles")
+    parser.add_argument("--force", action="store_true", help="Re-encrypt every file")
+    args = parser.parse_args()
+    main(args)
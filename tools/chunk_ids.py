@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:02:18 2026
+
+@author: tienn
+"""
+import hmac
+import json
+import hashlib
+from typing import Dict, Optional
+
+def content_digest(payload, length:int=10) -> str:
+    """
+    Short sha256 of a JSON-serializable payload (key order does not matter).
+    """
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:length]
+
+def keyed_digest(payload, key, length:int=64) -> str:
+    """
+    HMAC-sha256 of a JSON-serializable payload. For digests stored in clear
+    (the build manifest): without the key, a guessed payload cannot be confirmed.
+    """
+    key = key if isinstance(key, bytes) else key.encode("utf-8")
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hmac.new(key, data.encode("utf-8"), hashlib.sha256).hexdigest()[:length]
+
+def make_chunk_id(prefix:str, payload, seen:Optional[Dict[str, int]]=None) -> str:
+    """
+    Deterministic chunk id: the same content always gets the same id across
+    rebuilds, an edited chunk gets a new one. `seen` (shared over one
+    conversion) disambiguates identical chunks with a _2, _3... suffix.
+    """
+    chunk_id = f"{prefix}_{content_digest(payload)}"
+    if seen is not None:
+        seen[chunk_id] = seen.get(chunk_id, 0) + 1
+        if seen[chunk_id] > 1:
+            chunk_id = f"{chunk_id}_{seen[chunk_id]}"
+    return chunk_id
@@ -7,8 +7,8 @@ Created on Fri Dec 12 20:06:43 2025
 """
 
 import json
-import uuid
 import argparse
+from tools.chunk_ids import make_chunk_id
 
 def load_data(path: str):
     with open(path, "r", encoding="utf-8") as f:
@@ -19,6 +19,7 @@ def convert_nested_to_atomic(nested_data):
     Flattens hierarchical CV data into atomic 'facts' optimized for RAG.
     """
     atomic_list = []
+    seen_ids = {}
     
     for job in nested_data:
         # Parent Context (The "Where" and "When")
@@ -27,9 +28,6 @@ def convert_nested_to_atomic(nested_data):
         date_range = job.get('date', 'Unknown')
         
         for item in job.get('highlights', []):
-            # Create a unique ID for this specific bullet point
-            chunk_id = f"{company[:3].lower()}_{str(uuid.uuid4())[:8]}"
-            
             # Combine 'description' and 'details' for the full searchable text
             full_text = f"{item['description']} {item.get('details', '')}"
             
@@ -38,7 +36,6 @@ def convert_nested_to_atomic(nested_data):
             context_str = f"During my time as {role} at {company} ({date_range})"
             
             atomic_entry = {
-                "id": chunk_id,
                 "role": role,
                 "organization": company,
                 "date": date_range,
@@ -46,6 +43,8 @@ def convert_nested_to_atomic(nested_data):
                 "skills": [s.lower() for s in item.get('skills', [])], # Normalize to lowercase
                 "context_str": context_str
             }
+            # Content-hashed ID for this specific bullet point (stable across rebuilds)
+            atomic_entry = {"id": make_chunk_id(company[:3].lower(), atomic_entry, seen_ids), **atomic_entry}
             
             atomic_list.append(atomic_entry)
             
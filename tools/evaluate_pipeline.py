@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 09:12:26 2026
+
+@author: tienn
+
+Offline evaluation of the routing threshold and of retrieval quality on a
+labeled query set. One JSON object per line:
+
+    {"query": "How many years of Python?", "intent": "skills", "chunk_ids": ["..."]}
+    {"query": "Write me a poem about cats.", "intent": null}
+
+"intent" is null (or "out_of_scope") for queries the guardrail must block,
+"chunk_ids" (optional) are the ids of the chunks a good answer should use.
+All queries are encoded once, in batches, and the threshold sweep re-uses
+those embeddings and the raw routing scores:
+
+    python -m tools.evaluate_pipeline -e eval.jsonl -a anchors.json -i cv_atomic_db.json
+    python -m tools.evaluate_pipeline -e eval.jsonl --encrypted -o eval_report.json
+"""
+import json
+import time
+import argparse
+import numpy as np
+from chatbot.orchestrator import CVOrchestrator
+from chatbot.queryContext import QueryContext
+from chatbot.utils import load_data
+from typing import Dict, Any, List, Optional, Sequence
+
+BLOCKED_LABELS = (None, "", "out_of_scope", "blocked")
+DEFAULT_THRESHOLDS = [round(t, 2) for t in np.arange(0.20, 0.61, 0.05)]
+
+def load_cases(path:str) -> List[Dict[str, Any]]:
+    cases = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            case = json.loads(line)
+            if "query" not in case:
+                raise ValueError(f"{path}:{line_no}: missing 'query'")
+            intent = case.get("intent")
+            case["intent"] = None if intent in BLOCKED_LABELS else intent
+            case["chunk_ids"] = list(case.get("chunk_ids") or [])
+            cases.append(case)
+    return cases
+
+def ratio(num:float, den:float) -> Optional[float]:
+    return round(num / den, 4) if den else None
+
+def routing_sweep(expected:Sequence[Optional[str]], predicted:Sequence[str], scores:np.ndarray,
+                  thresholds:Sequence[float]) -> List[Dict[str, Any]]:
+    """
+    Precision / recall of the guardrail at every threshold, from the raw best
+    intent and score of each query (nothing is re-encoded or re-scored).
+        precision   : allowed queries routed to their expected intent / allowed queries
+        recall      : in-scope queries allowed and routed correctly / in-scope queries
+        false_allow : out-of-scope queries let through / out-of-scope queries
+    """
+    in_scope = np.array([e is not None for e in expected])
+    correct = np.array([e is not None and e == p for e, p in zip(expected, predicted)])
+    sweep = []
+    for threshold in thresholds:
+        allowed = scores >= threshold
+        tp = int(np.sum(allowed & correct))
+        precision = ratio(tp, int(allowed.sum()))
+        recall = ratio(tp, int(in_scope.sum()))
+        if precision is None or recall is None:
+            f1 = None
+        else:
+            f1 = round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0
+        sweep.append({"threshold": threshold,
+                      "precision": precision,
+                      "recall": recall,
+                      "f1": f1,
+                      "false_allow": ratio(int(np.sum(allowed & ~in_scope)), int((~in_scope).sum()))})
+    return sweep
+
+def per_intent_report(expected:Sequence[Optional[str]], predicted:Sequence[str], scores:np.ndarray,
+                      threshold:float) -> Dict[str, Dict[str, Any]]:
+    """
+    Precision / recall per intent at one threshold (blocked queries predict nothing).
+    """
+    routed = [p if s >= threshold else None for p, s in zip(predicted, scores)]
+    report = {}
+    for intent in sorted(set(e for e in expected if e is not None) | set(r for r in routed if r is not None)):
+        tp = sum(1 for e, r in zip(expected, routed) if e == intent and r == intent)
+        report[intent] = {"support": sum(1 for e in expected if e == intent),
+                          "precision": ratio(tp, sum(1 for r in routed if r == intent)),
+                          "recall": ratio(tp, sum(1 for e in expected if e == intent))}
+    return report
+
+def retrieval_report(ranked_ids:List[List[str]], relevant_ids:List[List[str]], ks:Sequence[int]) -> Dict[str, Any]:
+    """
+    Mean recall@k (share of the relevant chunks in the top k) and MRR (first relevant hit).
+    """
+    recalls = {k: [] for k in ks}
+    reciprocal_ranks = []
+    for ranked, relevant in zip(ranked_ids, relevant_ids):
+        relevant = set(relevant)
+        for k in ks:
+            recalls[k].append(len(relevant.intersection(ranked[:k])) / len(relevant))
+        rank = next((i for i, chunk_id in enumerate(ranked, 1) if chunk_id in relevant), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return {"queries": len(reciprocal_ranks),
+            "recall_at_k": {str(k): round(float(np.mean(v)), 4) if v else None for k, v in recalls.items()},
+            "mrr": round(float(np.mean(reciprocal_ranks)), 4) if reciprocal_ranks else None}
+
+def evaluate(orchestrator:CVOrchestrator, cases:List[Dict[str, Any]], thresholds:Sequence[float]=DEFAULT_THRESHOLDS,
+             threshold:float=0.35, ks:Sequence[int]=(1, 3, 5), batch_size:int=64,
+             retrieval_intent:str="expected") -> Dict[str, Any]:
+    model = orchestrator.embedding_model
+    queries = [case["query"] for case in cases]
+    expected = [case["intent"] for case in cases]
+
+    # 1. Encode every query once, in batches
+    start = time.perf_counter()
+    vectors = np.asarray(model.encode(queries, batch_size=batch_size, convert_to_numpy=True), dtype=np.float32)
+    encode_s = time.perf_counter() - start
+    contexts = [QueryContext.from_embedding(query, vector, model) for query, vector in zip(queries, vectors)]
+
+    # 2. Route once with no threshold: raw best intent + score per query
+    start = time.perf_counter()
+    routed = orchestrator.router.route_queries(queries, threshold=-np.inf, query_contexts=contexts)
+    route_s = time.perf_counter() - start
+    predicted = [r["intent"] for r in routed]
+    scores = np.array([r["score"] for r in routed], dtype=np.float32)
+
+    # 3. Threshold sweep on those scores
+    sweep = routing_sweep(expected, predicted, scores, thresholds)
+
+    # 4. Retrieval on the labeled in-scope queries (expected intent isolates retrieval from routing)
+    ranked_ids, relevant_ids = [], []
+    start = time.perf_counter()
+    for case, context, route in zip(cases, contexts, routed):
+        if not case["chunk_ids"] or case["intent"] is None:
+            continue
+        intent = case["intent"] if retrieval_intent == "expected" else route["intent"]
+        results = orchestrator.retriever.search(case["query"], intent, top_k=max(ks), query_context=context)
+        ranked_ids.append([r["id"] for r in results])
+        relevant_ids.append(case["chunk_ids"])
+    retrieve_s = time.perf_counter() - start
+
+    best = max((s for s in sweep if s["f1"] is not None), key=lambda s: s["f1"], default=None)
+    return {"queries": len(cases),
+            "in_scope": sum(1 for e in expected if e is not None),
+            "routing": {"sweep": sweep,
+                        "best_f1_threshold": best["threshold"] if best else None,
+                        "per_intent": per_intent_report(expected, predicted, scores, threshold),
+                        "threshold": threshold},
+            "retrieval": dict(retrieval_report(ranked_ids, relevant_ids, ks), intent=retrieval_intent),
+            "throughput_qps": {"encode": ratio(len(cases), encode_s),
+                               "route": ratio(len(cases), route_s),
+                               "retrieve": ratio(len(ranked_ids), retrieve_s),
+                               "total": ratio(len(cases), encode_s + route_s + retrieve_s)}}
+
+def print_report(report:Dict[str, Any]):
+    print(f"\n{report['queries']} queries ({report['in_scope']} in scope)")
+    print("\n--- Routing threshold sweep ---")
+    print(f"{'threshold':>9} {'precision':>9} {'recall':>7} {'f1':>7} {'false_allow':>11}")
+    for row in report["routing"]["sweep"]:
+        print(f"{row['threshold']:>9} " + " ".join(f"{str(row[k]):>{w}}" for k, w in
+                                                    (("precision", 9), ("recall", 7), ("f1", 7), ("false_allow", 11))))
+    print(f"Best F1 threshold: {report['routing']['best_f1_threshold']}")
+    print(f"\n--- Per intent (threshold={report['routing']['threshold']}) ---")
+    for intent, row in report["routing"]["per_intent"].items():
+        print(f"{intent:<12} support={row['support']:<4} precision={row['precision']} recall={row['recall']}")
+    retrieval = report["retrieval"]
+    print(f"\n--- Retrieval ({retrieval['queries']} labeled queries, {retrieval['intent']} intent) ---")
+    print(", ".join(f"recall@{k}={v}" for k, v in retrieval["recall_at_k"].items()) + f", MRR={retrieval['mrr']}")
+    print("\n--- Throughput (queries/s) ---")
+    print(", ".join(f"{k}={v}" for k, v in report["throughput_qps"].items()))
+
+def build_orchestrator(args) -> CVOrchestrator:
+    if args.hashing:
+        from chatbot.hashingEncoder import HashingEncoder
+        model = HashingEncoder()
+    else:
+        from chatbot.encoders import load_embedding_model
+        model = load_embedding_model()
+
+    if args.encrypted:
+        from chatbot.resources import load_encrypted_data, prefer_container, DEFAULT_PATHS
+        from tools.pickle_data import load_secret_key
+        # Same files as the app: .pkl or .cvc, whichever the last build / conversion wrote
+        inputs = load_encrypted_data(load_secret_key(),
+                                     **{name: prefer_container(path) for name, path in DEFAULT_PATHS.items()})
+    else:
+        inputs = {"anchors": load_data(args.anchors_path),
+                  "database": load_data(args.input_path),
+                  "contacts": load_data(args.contacts_path) if args.contacts_path
+                              else {"email_add": "test@example.com", "phone_num": "000"}}
+    return CVOrchestrator(**inputs, embedding_model=model, router_mode=args.router_mode,
+                          lexical_prefilter=args.lexical)
+
+def main(args):
+    orchestrator = build_orchestrator(args)
+    report = evaluate(orchestrator, load_cases(args.eval_path),
+                      thresholds=args.thresholds, threshold=args.threshold, ks=args.ks,
+                      batch_size=args.batch_size, retrieval_intent=args.retrieval_intent)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to '{args.output}'")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-e", "--eval_path", type=str, required=True)
+    parser.add_argument("-a", "--anchors_path", type=str, default='anchors.json')
+    parser.add_argument("-i", "--input_path", type=str, default='cv_atomic_db.json')
+    parser.add_argument("-c", "--contacts_path", type=str, default=None)
+    parser.add_argument("--encrypted", action="store_true", help="Load data/*.pkl with the key in .streamlit/secrets.toml")
+    parser.add_argument("--hashing", action="store_true", help="Offline deterministic encoder instead of the SentenceTransformer")
+    parser.add_argument("--router_mode", type=str, default="exhaustive", choices=["exhaustive", "centroid"])
+    parser.add_argument("-t", "--threshold", type=float, default=0.35)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("-k", "--ks", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("-b", "--batch_size", type=int, default=64)
+    parser.add_argument("--lexical", action="store_true", help="BM25 shortlist before the dense retrieval")
+    parser.add_argument("--retrieval_intent", type=str, default="expected", choices=["expected", "routed"])
+    parser.add_argument("-o", "--output", type=str, default=None)
+    args = parser.parse_args()
+    main(args)
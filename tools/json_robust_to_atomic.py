@@ -7,8 +7,8 @@ Created on Fri Dec 12 23:20:51 2025
 """
 
 import json
-import uuid
 import argparse
+from tools.chunk_ids import make_chunk_id
 
 def load_data(path: str):
     with open(path, "r", encoding="utf-8") as f:
@@ -25,6 +25,8 @@ def generate_context_string(category, role, name, start, end):
 
 def convert_robust_to_atomic(cv_data):
     atomic_list = []
+    # Content-hashed ids: stable across rebuilds, so changes can be diffed
+    seen_ids = {}
 
     # --- HELPER: Process generic job/education blocks ---
     def process_block(block, category):
@@ -52,8 +54,6 @@ def convert_robust_to_atomic(cv_data):
             }]
 
         for item in items:
-            chunk_id = f"{category[:3]}_{name[:3].lower().replace(' ', '')}_{str(uuid.uuid4())[:6]}"
-            
             # Combine details for search
             text_content = item.get('details', '')
             
@@ -61,7 +61,6 @@ def convert_robust_to_atomic(cv_data):
             context_str = generate_context_string(category, role, name, start_date, end_date)
             
             atomic_entry = {
-                "id": chunk_id,
                 "type": category, # Useful for filtering later
                 "role": role,
                 "name": name,
@@ -71,6 +70,9 @@ def convert_robust_to_atomic(cv_data):
                 "skills": [s.lower() for s in item.get('skills', [])],
                 "context_str": context_str
             }
+            # The id is derived from everything above (same chunk -> same id)
+            prefix = f"{category[:3]}_{name[:3].lower().replace(' ', '')}"
+            atomic_entry = {"id": make_chunk_id(prefix, atomic_entry, seen_ids), **atomic_entry}
             
             atomic_list.append(atomic_entry)
 
@@ -9,9 +9,7 @@ import json
 import pickle
 import os
 import argparse
-from cryptography.fernet import Fernet
 from pathlib import Path
-import toml
 
 class SecureDataTool:
     def __init__(self, key=None):
@@ -19,6 +17,9 @@ class SecureDataTool:
         Initialize the tool.
         If a key is provided, use it. Otherwise, generate a new one.
         """
+        # Imported on use so that importing the data tools stays cheap
+        from cryptography.fernet import Fernet
+
         if key:
             self.key = key
         else:
@@ -39,17 +40,25 @@ class SecureDataTool:
         with open(json_filepath, 'r') as f:
             data = json.load(f)
 
-        # 2. Convert data to a JSON string, then to bytes
+        self.dump_encrypted_pickle(data, pickle_filepath)
+        print(f"Success! Encrypted data saved to '{pickle_filepath}'")
+
+    def dump_encrypted_pickle(self, data, pickle_filepath):
+        """
+        Encrypts a JSON-serializable object and saves it as a pickle file.
+        The file is replaced atomically, so a running app never reads a half-written one.
+        """
+        # 1. Convert data to a JSON string, then to bytes
         json_bytes = json.dumps(data).encode('utf-8')
 
-        # 3. Encrypt the bytes
+        # 2. Encrypt the bytes
         encrypted_data = self.cipher.encrypt(json_bytes)
 
-        # 4. Pickle the encrypted data and write to file
-        with open(pickle_filepath, 'wb') as f:
+        # 3. Pickle the encrypted data and write to file
+        tmp_filepath = f"{pickle_filepath}.tmp{os.getpid()}"
+        with open(tmp_filepath, 'wb') as f:
             pickle.dump(encrypted_data, f)
-        
-        print(f"Success! Encrypted data saved to '{pickle_filepath}'")
+        os.replace(tmp_filepath, pickle_filepath)
 
     def load_encrypted_pickle(self, pickle_filepath):
         """
@@ -74,6 +83,7 @@ class SecureDataTool:
         return json_data
 
 def load_secret_key(key_path:str=".streamlit/secrets.toml") -> str:
+    import toml
     key = toml.load(key_path)
     return key["encode_key"]
 
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:05:12 2026
+
+@author: tienn
+
+Encrypted, record-addressable replacement for the pickled Fernet blobs.
+
+File layout (.cvc):
+    MAGIC                      5 bytes
+    header length              uint32, little endian
+    header                     Fernet token of a JSON index:
+                               {"format", "kind", "keys", "blocks": [[offset, length, first record]]}
+    blocks                     one Fernet token per block: a JSON list of
+                               consecutive records (list items / dict values),
+                               about BLOCK_BYTES of plaintext each
+
+The file is memory-mapped and only the header is decrypted on open; a block
+is decrypted and parsed when one of its records is accessed, so opening the
+contacts or reading one chunk does not decrypt the whole CV. Blocks rather
+than single records keep the per-token cost (HMAC, base64) of a full load
+close to the one-blob pickle. No pickle is involved.
+
+At runtime the database and the contacts are served from an open container
+(open_encrypted): only the records a query returns are read back, from a
+small LRU of decrypted blocks, and no plaintext copy of the CV is kept.
+
+    python -m tools.secure_container data/anchors.pkl data/cv_atomic_db.pkl data/contacts.pkl
+"""
+import os
+import json
+import mmap
+import struct
+import bisect
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional
+
+MAGIC = b"CVSC\x01"
+HEADER_LEN = struct.Struct("<I")
+CONTAINER_EXT = ".cvc"
+# Target plaintext size of one encrypted block
+BLOCK_BYTES = 64 * 1024
+# Decrypted blocks kept by a container opened for runtime (random) access
+RUNTIME_CACHE_BLOCKS = 16
+
+class SecureContainer:
+    """
+    Read side: lazy, per-block decryption of a .cvc file.
+        kind "list"  : container[i], len(), iteration over the items
+        kind "dict"  : container[key], keys(), iteration over the keys
+        kind "value" : a single record, load() returns it
+    The `cache_blocks` last used decrypted blocks are kept (thread-safe LRU).
+    """
+    def __init__(self, path:str, key, cache_blocks:int=1):
+        from cryptography.fernet import Fernet
+
+        self.path = path
+        self.cipher = Fernet(key)
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"'{path}' is not a secure container.")
+
+        start = len(MAGIC) + HEADER_LEN.size
+        (header_len,) = HEADER_LEN.unpack_from(self._mm, len(MAGIC))
+        header = json.loads(self._decrypt(start, header_len))
+        # Changes with every write of the file (the token has a fresh IV)
+        self.fingerprint = hashlib.sha256(self._mm[start:start + header_len]).hexdigest()[:16]
+        self.kind = header["kind"]
+        self.blocks = header["blocks"]
+        self.n_records = header["records"]
+        self.body_start = start + header_len
+        self._index = {k: i for i, k in enumerate(header["keys"])} if self.kind == "dict" else None
+        self._first_records = [first for _, _, first in self.blocks]
+        # Last used decrypted blocks (sequential reads decrypt every block once)
+        self.cache_blocks = max(cache_blocks, 1)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _decrypt(self, offset:int, length:int) -> bytes:
+        try:
+            return self.cipher.decrypt(self._mm[offset:offset + length])
+        except Exception as e:
+            raise ValueError("Decryption failed. Invalid Key or Corrupted Data.") from e
+
+    def _read_block(self, b:int) -> List[Any]:
+        offset, length, _ = self.blocks[b]
+        return json.loads(self._decrypt(self.body_start + offset, length))
+
+    def _block(self, b:int) -> List[Any]:
+        with self._cache_lock:
+            records = self._cache.get(b)
+            if records is not None:
+                self._cache.move_to_end(b)
+                return records
+        # Decrypted outside the lock: concurrent readers of other blocks do not wait
+        records = self._read_block(b)
+        with self._cache_lock:
+            self._cache[b] = records
+            while len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        return records
+
+    def record(self, i:int) -> Any:
+        if not 0 <= i < self.n_records:
+            raise IndexError(i)
+        b = bisect.bisect_right(self._first_records, i) - 1
+        return self._block(b)[i - self._first_records[b]]
+
+    def __len__(self):
+        return self.n_records
+
+    def keys(self) -> List[str]:
+        return list(self._index) if self._index is not None else []
+
+    def get(self, key, default=None) -> Any:
+        try:
+            return self[key]
+        except (KeyError, IndexError):
+            return default
+
+    def __getitem__(self, item) -> Any:
+        if self._index is not None:
+            return self.record(self._index[item])
+        return self.record(item)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._index is not None:
+            return iter(list(self._index))
+        return (self.record(i) for i in range(len(self)))
+
+    def load(self) -> Any:
+        """
+        The whole object, decrypted block by block (no full plaintext copy in memory).
+        """
+        records = [r for b in range(len(self.blocks)) for r in self._read_block(b)]
+        if self.kind == "dict":
+            return dict(zip(self._index, records))
+        if self.kind == "list":
+            return records
+        return records[0]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def write_container(data:Any, path:str, key, block_bytes:int=BLOCK_BYTES):
+    """
+    Encrypts a JSON-serializable object block by block. The file is
+    replaced atomically, so a running app never reads a half-written one.
+    """
+    from cryptography.fernet import Fernet
+
+    cipher = Fernet(key)
+    if isinstance(data, dict):
+        kind, keys, records = "dict", list(data), list(data.values())
+    elif isinstance(data, list):
+        kind, keys, records = "list", [], data
+    else:
+        kind, keys, records = "value", [], [data]
+
+    # Consecutive records are grouped until a block reaches block_bytes
+    tokens, blocks, position = [], [], 0
+    pending, pending_bytes, first = [], 0, 0
+    for i, r in enumerate(records):
+        encoded = json.dumps(r)
+        pending.append(encoded)
+        pending_bytes += len(encoded)
+        if pending_bytes >= block_bytes or i == len(records) - 1:
+            token = cipher.encrypt(("[" + ",".join(pending) + "]").encode("utf-8"))
+            blocks.append([position, len(token), first])
+            tokens.append(token)
+            position += len(token)
+            first = i + 1
+            pending, pending_bytes = [], 0
+    header = cipher.encrypt(json.dumps({"format": 1, "kind": kind, "keys": keys, "records": len(records),
+                                        "blocks": blocks}).encode("utf-8"))
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER_LEN.pack(len(header)))
+        f.write(header)
+        for token in tokens:
+            f.write(token)
+    os.replace(tmp_path, path)
+
+def container_path(path:str) -> str:
+    return os.path.splitext(path)[0] + CONTAINER_EXT
+
+def load_encrypted(path:str, key) -> Any:
+    """
+    Loads a data file in either format: .cvc container or legacy encrypted pickle.
+    """
+    if path.endswith(CONTAINER_EXT):
+        with SecureContainer(path, key) as container:
+            return container.load()
+    from tools.pickle_data import SecureDataTool
+    return SecureDataTool(key).load_encrypted_pickle(path)
+
+def open_encrypted(path:str, key, cache_blocks:int=RUNTIME_CACHE_BLOCKS) -> Any:
+    """
+    Runtime access to a data file: an open, lazily decrypted container for
+    .cvc files (list / dict interface), the loaded object for legacy pickles.
+    """
+    if path.endswith(CONTAINER_EXT):
+        return SecureContainer(path, key, cache_blocks)
+    return load_encrypted(path, key)
+
+def convert_pickle(pickle_path:str, key, output_path:Optional[str]=None) -> str:
+    """
+    Converts one legacy encrypted pickle to a container next to it (same key).
+    """
+    output_path = output_path or container_path(pickle_path)
+    write_container(load_encrypted(pickle_path, key), output_path, key)
+    print(f"Converted '{pickle_path}' -> '{output_path}'")
+    return output_path
+
+def main(args):
+    from tools.pickle_data import load_secret_key
+    key = args.key if args.key else load_secret_key(args.secrets)
+    for path in args.pickle_paths:
+        convert_pickle(path, key)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pickle_paths", type=str, nargs="+")
+    parser.add_argument("--secrets", type=str, default=".streamlit/secrets.toml")
+    parser.add_argument("--key", type=str, default=None)
+    args = parser.parse_args()
+    main(args)